@@ -0,0 +1,42 @@
+# analyzers/_njit.py
+"""
+Decorador njit opcional.
+Usa Numba quando instalado; caso contrário devolve a função Python original.
+"""
+
+from typing import Callable, Optional, Sequence
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback sem Numba: aceita @njit e @njit(...) e não faz nada."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+
+
+def select_kernel(loop: Callable, fallback: Optional[Callable] = None,
+                  warmup_args: Optional[Sequence] = None) -> Callable:
+    """
+    Escolhe a implementação de um kernel.
+    Com Numba devolve o laço compilado, já chamado com `warmup_args` para
+    compilar (ou carregar do cache em disco) na importação, fora do caminho
+    quente. Sem Numba devolve o `fallback` NumPy - ou o próprio laço, que
+    roda interpretado, quando não há fallback.
+    """
+    if not NUMBA_AVAILABLE:
+        return loop if fallback is None else fallback
+    if warmup_args is not None:
+        loop(*warmup_args)
+    return loop
+
+
+__all__ = ['njit', 'NUMBA_AVAILABLE', 'select_kernel']
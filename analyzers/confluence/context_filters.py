@@ -4,7 +4,8 @@ Filtros de contexto simplificados para validação de sinais estratégicos.
 Versão otimizada removendo complexidade desnecessária.
 """
 
-from typing import Dict, List, Any
+from types import MappingProxyType
+from typing import Dict, Mapping, Sequence, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
@@ -15,14 +16,50 @@ from domain.entities.book import OrderBook
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+_NO_ADJUSTMENTS: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(frozen=True, slots=True)
 class FilterResult:
-    """Resultado simplificado da aplicação de um filtro."""
+    """Resultado simplificado da aplicação de um filtro (imutável, pode ser compartilhado)."""
     passed: bool
     score: float = 1.0
     reason: str = ""
-    adjustments: Dict[str, Any] = field(default_factory=dict)
-    warnings: List[str] = field(default_factory=list)
+    adjustments: Mapping[str, Any] = field(default_factory=lambda: _NO_ADJUSTMENTS)
+    warnings: Sequence[str] = ()
+
+
+_MANIPULATION_ADJUSTMENTS: Mapping[str, Any] = MappingProxyType({'reduce_size': 0.7, 'use_limit_orders': True})
+
+# Resultados compartilhados para os caminhos sem ajuste
+_PASS = FilterResult(passed=True, score=1.0)
+_BASIC_OK = FilterResult(passed=True, score=1.0, reason="Validações básicas OK")
+_INVALID_PRICES = FilterResult(
+    passed=False,
+    score=0.0,
+    reason="Preços inválidos",
+    warnings=("Preço de entrada ou stop inválido",)
+)
+_LOW_RISK_REWARD = FilterResult(
+    passed=True,
+    score=0.6,
+    reason="Risk/reward baixo",
+    warnings=("R/R abaixo de 1:1",)
+)
+_VOLATILITY_RESULTS = {
+    "HIGH": FilterResult(
+        passed=True, score=0.8,
+        adjustments=MappingProxyType({'widen_stop': 1.3, 'reduce_size': 0.8})
+    ),
+    "EXTREME": FilterResult(
+        passed=True, score=0.8,
+        adjustments=MappingProxyType({'widen_stop': 1.5, 'reduce_size': 0.6})
+    ),
+    "LOW": FilterResult(
+        passed=True, score=1.0,
+        adjustments=MappingProxyType({'tighten_stop': 0.8})
+    )
+}
 
 
 class FilterType(str, Enum):
@@ -63,11 +100,20 @@ class ContextFilters:
         if not basic_result.passed:
             return self._create_fail_result(basic_result.reason, basic_result.warnings)
         
+        # Score acumulado durante a aplicação (sem nova passada sobre results)
+        score_sum = basic_result.score
+        min_score = basic_result.score
+        n_results = 1
+        
         # 2. Verificação simples de manipulação
         book = context.get('book')
         if book:
-            manip_result = self._check_manipulation(book, signal)
+            manip_result = self._evaluate_manipulation(book)
             results['manipulation'] = manip_result
+            score_sum += manip_result.score
+            if manip_result.score < min_score:
+                min_score = manip_result.score
+            n_results += 1
             warnings.extend(manip_result.warnings)
             adjustments.update(manip_result.adjustments)
         
@@ -76,14 +122,20 @@ class ContextFilters:
         if volatility:
             vol_result = self._adjust_for_volatility(signal, volatility)
             results['volatility'] = vol_result
+            score_sum += vol_result.score
+            if vol_result.score < min_score:
+                min_score = vol_result.score
+            n_results += 1
             adjustments.update(vol_result.adjustments)
         
         # Calcula score final
-        total_score = sum(r.score for r in results.values()) / len(results)
-        passed = total_score >= 0.5 and not any(r.score < 0.3 for r in results.values())
+        total_score = score_sum / n_results
+        passed = total_score >= 0.5 and min_score >= 0.3
         
         # Calcula multiplicador de confiança
-        confidence_multiplier = min(max(total_score, 0.5), 1.0)
+        confidence_multiplier = (
+            0.5 if total_score < 0.5 else (1.0 if total_score > 1.0 else total_score)
+        )
         
         return {
             'passed': passed,
@@ -99,67 +151,42 @@ class ContextFilters:
         """Verifica validade básica do sinal."""
         # Verifica se preços fazem sentido
         if signal.stop_loss <= 0 or signal.entry_price <= 0:
-            return FilterResult(
-                passed=False,
-                score=0.0,
-                reason="Preços inválidos",
-                warnings=["Preço de entrada ou stop inválido"]
-            )
+            return _INVALID_PRICES
         
         # Verifica risk/reward mínimo
         if signal.risk_reward < 1.0:
-            return FilterResult(
-                passed=True,
-                score=0.6,
-                reason="Risk/reward baixo",
-                warnings=["R/R abaixo de 1:1"]
-            )
+            return _LOW_RISK_REWARD
         
-        return FilterResult(passed=True, score=1.0, reason="Validações básicas OK")
+        return _BASIC_OK
     
-    def _check_manipulation(self, book: OrderBook, signal: StrategicSignal) -> FilterResult:
-        """Verificação simplificada de manipulação."""
+    def _evaluate_manipulation(self, book: OrderBook) -> FilterResult:
+        """Calcula o desbalanceamento dos 5 primeiros níveis do book."""
         if not book.bids or not book.asks:
-            return FilterResult(passed=True, score=1.0)
+            return _PASS
         
         # Calcula desbalanceamento do book
-        bid_volume = sum(level.volume for level in book.bids[:5])
-        ask_volume = sum(level.volume for level in book.asks[:5])
+        bid_volume = book.top_bid_volume(5)
+        ask_volume = book.top_ask_volume(5)
         
         if bid_volume == 0 or ask_volume == 0:
-            return FilterResult(passed=True, score=1.0)
+            return _PASS
         
-        imbalance_ratio = max(bid_volume / ask_volume, ask_volume / bid_volume)
+        imbalance_ratio = bid_volume / ask_volume if bid_volume >= ask_volume else ask_volume / bid_volume
         
         if imbalance_ratio > self.manipulation_threshold:
             heavier_side = "compra" if bid_volume > ask_volume else "venda"
             return FilterResult(
                 passed=True,
                 score=0.5,
-                warnings=[f"Book desbalanceado na {heavier_side} ({imbalance_ratio:.1f}x)"],
-                adjustments={'reduce_size': 0.7, 'use_limit_orders': True}
+                warnings=(f"Book desbalanceado na {heavier_side} ({imbalance_ratio:.1f}x)",),
+                adjustments=_MANIPULATION_ADJUSTMENTS
             )
         
-        return FilterResult(passed=True, score=1.0)
+        return _PASS
     
     def _adjust_for_volatility(self, signal: StrategicSignal, volatility: str) -> FilterResult:
         """Ajusta baseado na volatilidade."""
-        adjustments = {}
-        
-        if volatility == "HIGH":
-            adjustments['widen_stop'] = 1.3
-            adjustments['reduce_size'] = 0.8
-        elif volatility == "EXTREME":
-            adjustments['widen_stop'] = 1.5
-            adjustments['reduce_size'] = 0.6
-        elif volatility == "LOW":
-            adjustments['tighten_stop'] = 0.8
-        
-        return FilterResult(
-            passed=True,
-            score=0.8 if volatility in ["HIGH", "EXTREME"] else 1.0,
-            adjustments=adjustments
-        )
+        return _VOLATILITY_RESULTS.get(volatility, _PASS)
     
     def _get_recommendation(self, passed: bool, score: float) -> str:
         """Gera recomendação simples."""
@@ -184,7 +211,7 @@ class ContextFilters:
             'recommendation': 'PROCEED - Filtros desabilitados'
         }
     
-    def _create_fail_result(self, reason: str, warnings: List[str]) -> Dict[str, Any]:
+    def _create_fail_result(self, reason: str, warnings: Sequence[str]) -> Dict[str, Any]:
         """Resultado quando falha validação básica."""
         return {
             'passed': False,
@@ -192,7 +219,7 @@ class ContextFilters:
             'confidence_multiplier': 0.5,
             'filter_results': {},
             'adjustments': {},
-            'warnings': warnings,
+            'warnings': list(warnings),
             'recommendation': f'SKIP - {reason}'
         }
     
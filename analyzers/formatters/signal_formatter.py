@@ -4,43 +4,96 @@ Formatador simplificado de sinais.
 Versão refatorada - Sprint 2.
 """
 
+import sys
+from collections import ChainMap
 from typing import Dict
 from domain.entities.signal import Signal, SignalSource, SignalLevel
 
 
+def _interned(mapping: Dict) -> Dict:
+    """Copia o mapeamento com as chaves (nomes de padrão) internadas."""
+    return {sys.intern(k): v for k, v in mapping.items()}
+
+
+# Mapeamento de padrões para emojis
+PATTERN_EMOJIS = _interned({
+    "ESCORA_DETECTADA": "🛡️",
+    "PACE_ANOMALY": "⚡",
+    "DIVERGENCIA_BAIXA": "📉",
+    "DIVERGENCIA_ALTA": "📈",
+    "MOMENTUM_EXTREMO": "🚀",
+    "ICEBERG": "🧊",
+    "PRESSAO_COMPRA": "💹",
+    "PRESSAO_VENDA": "💥",
+    "VOLUME_SPIKE": "📊"
+})
+
+# Mapeamento de padrões para níveis
+PATTERN_LEVELS = _interned({
+    # Alta prioridade
+    "ESCORA_DETECTADA": SignalLevel.ALERT,
+    "DIVERGENCIA_BAIXA": SignalLevel.ALERT,
+    "DIVERGENCIA_ALTA": SignalLevel.ALERT,
+    "MOMENTUM_EXTREMO": SignalLevel.ALERT,
+    "ICEBERG": SignalLevel.ALERT,
+    "PRESSAO_COMPRA": SignalLevel.ALERT,
+    "PRESSAO_VENDA": SignalLevel.ALERT,
+    # Média prioridade
+    "PACE_ANOMALY": SignalLevel.WARNING,
+    "VOLUME_SPIKE": SignalLevel.WARNING
+})
+
+# Templates de mensagem por padrão: (template, valores padrão dos campos)
+PATTERN_TEMPLATES = _interned({
+    "ESCORA_DETECTADA": (
+        "{emoji} {direction} | Absorção {symbol} @ {level:.2f} (Vol: {volume})",
+        {'direction': 'COMPRA', 'level': 0.0, 'volume': 0}
+    ),
+    "DIVERGENCIA_ALTA": (
+        "{emoji} COMPRA | Divergência Alta {symbol} (ROC: {cvd_roc:+.0f}%)",
+        {'cvd_roc': 0.0}
+    ),
+    "DIVERGENCIA_BAIXA": (
+        "{emoji} VENDA | Divergência Baixa {symbol} (ROC: {cvd_roc:+.0f}%)",
+        {'cvd_roc': 0.0}
+    ),
+    "MOMENTUM_EXTREMO": (
+        "{emoji} {direction} | Momentum Extremo {symbol} (CVD: {cvd_roc:+.0f}%)",
+        {'direction': 'NEUTRO', 'cvd_roc': 0.0}
+    ),
+    "ICEBERG": (
+        "{emoji} ICEBERG | Travamento {symbol} @ {price:.2f} ({repetitions}x)",
+        {'price': 0.0, 'repetitions': 0}
+    ),
+    "PRESSAO_COMPRA": (
+        "{emoji} COMPRA | Pressão {symbol} ({ratio:.0%})",
+        {'ratio': 0.0}
+    ),
+    "PRESSAO_VENDA": (
+        "{emoji} VENDA | Pressão {symbol} ({ratio:.0%})",
+        {'ratio': 0.0}
+    ),
+    "VOLUME_SPIKE": (
+        "{emoji} {direction} | Volume Spike {symbol} ({multiplier:.1f}x)",
+        {'multiplier': 0.0, 'direction': 'NEUTRO'}
+    ),
+    "PACE_ANOMALY": (
+        "{emoji} {direction} | Pace Anormal {symbol} ({pace:.0f} t/s)",
+        {'direction': 'NEUTRO', 'pace': 0.0}
+    )
+})
+
+
 class SignalFormatter:
     """
     Formata os dicionários brutos dos detectores em entidades Signal.
     Versão simplificada sem formatações complexas.
     """
 
-    # Mapeamento de padrões para emojis
-    PATTERN_EMOJIS = {
-        "ESCORA_DETECTADA": "🛡️",
-        "PACE_ANOMALY": "⚡",
-        "DIVERGENCIA_BAIXA": "📉",
-        "DIVERGENCIA_ALTA": "📈",
-        "MOMENTUM_EXTREMO": "🚀",
-        "ICEBERG": "🧊",
-        "PRESSAO_COMPRA": "💹",
-        "PRESSAO_VENDA": "💥",
-        "VOLUME_SPIKE": "📊"
-    }
-
-    # Mapeamento de padrões para níveis
-    PATTERN_LEVELS = {
-        # Alta prioridade
-        "ESCORA_DETECTADA": SignalLevel.ALERT,
-        "DIVERGENCIA_BAIXA": SignalLevel.ALERT,
-        "DIVERGENCIA_ALTA": SignalLevel.ALERT,
-        "MOMENTUM_EXTREMO": SignalLevel.ALERT,
-        "ICEBERG": SignalLevel.ALERT,
-        "PRESSAO_COMPRA": SignalLevel.ALERT,
-        "PRESSAO_VENDA": SignalLevel.ALERT,
-        # Média prioridade
-        "PACE_ANOMALY": SignalLevel.WARNING,
-        "VOLUME_SPIKE": SignalLevel.WARNING
-    }
+    # Mantidos como atributos de classe para compatibilidade
+    PATTERN_EMOJIS = PATTERN_EMOJIS
+    PATTERN_LEVELS = PATTERN_LEVELS
+    PATTERN_TEMPLATES = PATTERN_TEMPLATES
 
     def format(self, raw_signal: Dict, symbol: str) -> Signal:
         """
@@ -53,7 +106,7 @@ class SignalFormatter:
         message = self._create_simple_message(pattern, symbol, raw_signal)
         
         # Determina nível baseado no padrão
-        level = self.PATTERN_LEVELS.get(pattern, SignalLevel.INFO)
+        level = PATTERN_LEVELS.get(pattern, SignalLevel.INFO)
 
         # Adiciona o padrão original aos detalhes
         raw_signal['original_pattern'] = pattern
@@ -70,49 +123,12 @@ class SignalFormatter:
         Cria uma mensagem simples e clara para o sinal.
         Formato: [EMOJI] [AÇÃO] | [DESCRIÇÃO] [SYMBOL] [DETALHES-CHAVE]
         """
-        emoji = self.PATTERN_EMOJIS.get(pattern, "📌")
-        
-        if pattern == "ESCORA_DETECTADA":
-            direction = details.get('direction', 'COMPRA')
-            level = details.get('level', 0.0)
-            volume = details.get('volume', 0)
-            return f"{emoji} {direction} | Absorção {symbol} @ {level:.2f} (Vol: {volume})"
-        
-        elif pattern == "DIVERGENCIA_ALTA":
-            roc = details.get('cvd_roc', 0.0)
-            return f"{emoji} COMPRA | Divergência Alta {symbol} (ROC: {roc:+.0f}%)"
-            
-        elif pattern == "DIVERGENCIA_BAIXA":
-            roc = details.get('cvd_roc', 0.0)
-            return f"{emoji} VENDA | Divergência Baixa {symbol} (ROC: {roc:+.0f}%)"
-            
-        elif pattern == "MOMENTUM_EXTREMO":
-            direction = details.get('direction', 'NEUTRO')
-            roc = details.get('cvd_roc', 0.0)
-            return f"{emoji} {direction} | Momentum Extremo {symbol} (CVD: {roc:+.0f}%)"
-            
-        elif pattern == "ICEBERG":
-            price = details.get('price', 0.0)
-            reps = details.get('repetitions', 0)
-            return f"{emoji} ICEBERG | Travamento {symbol} @ {price:.2f} ({reps}x)"
-        
-        elif pattern == "PRESSAO_COMPRA":
-            ratio = details.get('ratio', 0.0) * 100
-            return f"{emoji} COMPRA | Pressão {symbol} ({ratio:.0f}%)"
-        
-        elif pattern == "PRESSAO_VENDA":
-            ratio = details.get('ratio', 0.0) * 100
-            return f"{emoji} VENDA | Pressão {symbol} ({ratio:.0f}%)"
+        emoji = PATTERN_EMOJIS.get(pattern, "📌")
         
-        elif pattern == "VOLUME_SPIKE":
-            mult = details.get('multiplier', 0.0)
-            direction = details.get('direction', 'NEUTRO')
-            return f"{emoji} {direction} | Volume Spike {symbol} ({mult:.1f}x)"
-            
-        elif pattern == "PACE_ANOMALY":
-            direction = details.get('direction', 'NEUTRO')
-            pace = details.get('pace', 0.0)
-            return f"{emoji} {direction} | Pace Anormal {symbol} ({pace:.0f} t/s)"
+        entry = PATTERN_TEMPLATES.get(pattern)
+        if entry is not None:
+            template, defaults = entry
+            return template.format_map(ChainMap({'emoji': emoji, 'symbol': symbol}, details, defaults))
 
         # Padrão genérico
         return f"{emoji} {pattern} | Sinal {symbol}"
\ No newline at end of file
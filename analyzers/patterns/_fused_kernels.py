@@ -0,0 +1,76 @@
+"""Kernel compilado que varre a janela de trades uma única vez para os detectores."""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _fused_scan(prices, volumes, sides, ice_start, tp, tv, press_start, tail_start, tol=0.5):
+    """
+    Agrega, em uma passada, os volumes por nível de meio-tick (absorção),
+    os contadores de repetição no preço `tp` a partir de `ice_start` (iceberg)
+    e os volumes por lado a partir de `press_start` (pressão) e de
+    `tail_start` (spike de volume).
+
+    Returns:
+        (keys, level_volume, level_buy, first_seen, total_volume,
+         similar_count, volume_at_price, flow) - keys = níveis distintos em
+         ordem crescente; flow = [pressão total, compra, venda, cauda total,
+         compra, venda]
+    """
+    n = prices.size
+    levels = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        levels[i] = np.int64(np.rint(prices[i] * 2.0))
+
+    # Só os níveis presentes: um preço fora da escala não faz os vetores
+    # crescerem com a distância entre os níveis
+    keys = np.unique(levels)
+    index = np.searchsorted(keys, levels)
+    m = keys.size
+    level_volume = np.zeros(m, dtype=np.int64)
+    level_buy = np.zeros(m, dtype=np.int64)
+    first_seen = np.full(m, n, dtype=np.int64)
+
+    total = 0
+    count = 0
+    at_price = 0.0
+    flow = np.zeros(6, dtype=np.int64)
+    for i in range(n):
+        j = index[i]
+        v = volumes[i]
+        total += v
+        level_volume[j] += v
+        s = sides[i]
+        if s == 1:  # SIDE_BUY
+            level_buy[j] += v
+        if first_seen[j] == n:
+            first_seen[j] = i
+        if i >= ice_start:
+            dp = prices[i] - tp
+            if -tol < dp < tol:  # Tolerância de 1 tick
+                at_price += v
+                if v == tv:  # Mesmo tamanho = fracionamento
+                    count += 1
+        if i >= press_start:
+            flow[0] += v
+            if s == 1:
+                flow[1] += v
+            elif s == -1:  # SIDE_SELL
+                flow[2] += v
+        if i >= tail_start:
+            flow[3] += v
+            if s == 1:
+                flow[4] += v
+            elif s == -1:
+                flow[5] += v
+
+    return keys, level_volume, level_buy, first_seen, total, count, at_price, flow
+
+
+# Sem fallback: o FusedWindowDetector só usa a varredura fundida com Numba
+_fused_scan = select_kernel(
+    _fused_scan, None,
+    (np.zeros(16), np.zeros(16, dtype=np.int64), np.zeros(16, dtype=np.int8), 0, 0.0, 0, 0, 0)
+)
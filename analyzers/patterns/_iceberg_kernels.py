@@ -0,0 +1,35 @@
+# analyzers/patterns/_iceberg_kernels.py
+"""Kernel compilado da varredura do IcebergDetector (fallback NumPy sem numba)."""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _scan_loop(prices, volumes, tp, tv, tol=0.5):
+    """
+    Conta trades do mesmo tamanho e soma o volume no preço `tp`.
+
+    Returns:
+        (similar_count, total_volume)
+    """
+    count = 0
+    total = 0.0
+    for i in range(prices.size - 1, -1, -1):
+        dp = prices[i] - tp
+        if -tol < dp < tol:  # Tolerância de 1 tick
+            total += volumes[i]
+            if volumes[i] == tv:  # Mesmo tamanho = fracionamento
+                count += 1
+    return count, total
+
+
+def _scan_numpy(prices, volumes, tp, tv, tol=0.5):
+    """Mesma varredura com máscara booleana vetorizada."""
+    matched = volumes[np.abs(prices - tp) < tol]
+    return int(np.count_nonzero(matched == tv)), float(matched.sum())
+
+
+# Sem numba o laço puro seria interpretado; a máscara NumPy é bem mais rápida
+_scan = select_kernel(_scan_loop, _scan_numpy, (np.zeros(16), np.zeros(16, dtype=np.int64), 0.0, 0))
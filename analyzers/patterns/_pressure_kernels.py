@@ -0,0 +1,39 @@
+"""Kernel compilado da soma de volume por lado do PressureDetector (fallback NumPy sem numba)."""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _sum_sides_loop(volumes, sides):
+    """
+    Soma o volume comprador e vendedor em uma passada (UNKNOWN fica de fora).
+
+    Returns:
+        (buy_volume, sell_volume)
+    """
+    buy = 0
+    sell = 0
+    for i in range(volumes.shape[0]):
+        v = volumes[i]
+        s = sides[i]
+        buy += v * (s == 1)    # SIDE_BUY
+        sell += v * (s == -1)  # SIDE_SELL
+    return buy, sell
+
+
+def _sum_sides_numpy(volumes, sides):
+    """
+    Mesma soma com dois produtos escalares, sem indexação por máscara:
+    com lados em {1, -1, 0}, dot(v, s) = compra - venda e dot(v, s²) = compra + venda.
+    """
+    net = int(np.dot(volumes, sides))
+    gross = int(np.dot(volumes, sides * sides))
+    return (gross + net) // 2, (gross - net) // 2
+
+
+_sum_sides = select_kernel(
+    _sum_sides_loop, _sum_sides_numpy,
+    (np.zeros(16, dtype=np.int64), np.zeros(16, dtype=np.int8))
+)
@@ -1,68 +1,90 @@
 # analyzers/patterns/absorption_detector.py
-from collections import defaultdict
-from typing import List, Optional, Dict
-from domain.entities.trade import Trade
+from typing import List, Optional, Dict, Union
+import numpy as np
+from domain.entities.trade import Trade, SIDE_BUY
+from analyzers.statistics.trade_window import TradeArrays, as_trade_arrays
 
 class AbsorptionDetector:
     """Detecta padrões de absorção e escoras de volume."""
 
+    __slots__ = ('concentration_threshold', 'min_volume_threshold')
+
+    # Mínimo de trades na janela para avaliar a escora
+    MIN_TRADES = 50
+
     def __init__(self, concentration_threshold=0.4, min_volume_threshold=200):
         self.concentration_threshold = concentration_threshold
         self.min_volume_threshold = min_volume_threshold
 
-    def detect(self, recent_trades: List[Trade]) -> Optional[Dict]:
+    def detect(self, recent_trades: Union[List[Trade], TradeArrays]) -> Optional[Dict]:
         """Analisa os últimos trades para detectar uma escora."""
-        if len(recent_trades) < 50:
+        prices, volumes, sides = as_trade_arrays(recent_trades)
+        total_volume = volumes.sum()
+        if not self._accepts(len(prices), total_volume):
             return None
 
-        level_analysis = defaultdict(lambda: {'volume': 0, 'buy_vol': 0, 'sell_vol': 0})
-        total_volume = 0
+        # Agrupa por nível de 0.5 ponto (meio-tick inteiro)
+        levels = np.rint(prices * 2).astype(np.int64)
+        keys, first_seen, inverse = np.unique(levels, return_index=True, return_inverse=True)
+        level_volume = np.bincount(inverse, weights=volumes)
+        buy_vol = np.bincount(inverse, weights=volumes * (sides == SIDE_BUY))
 
-        for trade in recent_trades:
-            level = round(trade.price / 0.5) * 0.5
-            analysis = level_analysis[level]
-            analysis['volume'] += trade.volume
-            
-            if trade.side.name == 'BUY':
-                analysis['buy_vol'] += trade.volume
-            else:
-                analysis['sell_vol'] += trade.volume
-            
-            total_volume += trade.volume
+        return self.detect_from_levels(len(prices), keys, first_seen, level_volume, buy_vol, total_volume)
+
+    def detect_from_levels(self, trade_count: int, keys: np.ndarray, first_seen: np.ndarray,
+                           level_volume: np.ndarray, buy_vol: np.ndarray, total_volume) -> Optional[Dict]:
+        """
+        Detecta a escora a partir dos volumes já agregados por nível de meio-tick
+        (níveis distintos em `keys`), com o mesmo filtro de entrada de `detect`.
+        """
+        if not self._accepts(trade_count, total_volume):
+            return None
 
-        if total_volume == 0:
+        sell_vol = level_volume - buy_vol
+        concentration = level_volume / total_volume
+        candidates = np.flatnonzero(
+            (concentration > self.concentration_threshold) &
+            (level_volume > self.min_volume_threshold)
+        )
+        if candidates.size == 0:
             return None
 
-        for level, analysis in level_analysis.items():
-            concentration = analysis['volume'] / total_volume
-            if concentration > self.concentration_threshold and analysis['volume'] > self.min_volume_threshold:
-                # Análise da absorção - sempre tem direção!
-                buy_ratio = analysis['buy_vol'] / analysis['volume']
-                sell_ratio = analysis['sell_vol'] / analysis['volume']
-                
-                # Absorção na COMPRA: vendedores estão sendo absorvidos (suporte)
-                if sell_ratio > 0.6:  # Maioria vendendo mas preço segura
-                    escora_type = "ABSORÇÃO"
-                    direction = "COMPRA"
-                # Absorção na VENDA: compradores estão sendo absorvidos (resistência)
-                elif buy_ratio > 0.6:  # Maioria comprando mas preço não sobe
-                    escora_type = "ABSORÇÃO"
-                    direction = "VENDA"
-                # Outros casos são suporte/resistência normais
-                elif analysis['buy_vol'] > analysis['sell_vol']:
-                    escora_type = "SUPORTE"
-                    direction = "COMPRA"
-                else:
-                    escora_type = "RESISTÊNCIA"
-                    direction = "VENDA"
-                
-                return {
-                    "pattern": "ESCORA_DETECTADA",
-                    "level": level,
-                    "volume": analysis['volume'],
-                    "concentration": concentration,
-                    "type": escora_type,
-                    "direction": direction,
-                }
+        # Mantém a ordem de aparição dos níveis (como no loop original)
+        i = candidates[np.argmin(first_seen[candidates])]
+        volume = level_volume[i]
+
+        # Análise da absorção - sempre tem direção!
+        buy_ratio = buy_vol[i] / volume
+        sell_ratio = sell_vol[i] / volume
+        
+        # Absorção na COMPRA: vendedores estão sendo absorvidos (suporte)
+        if sell_ratio > 0.6:  # Maioria vendendo mas preço segura
+            escora_type = "ABSORÇÃO"
+            direction = "COMPRA"
+        # Absorção na VENDA: compradores estão sendo absorvidos (resistência)
+        elif buy_ratio > 0.6:  # Maioria comprando mas preço não sobe
+            escora_type = "ABSORÇÃO"
+            direction = "VENDA"
+        # Outros casos são suporte/resistência normais
+        elif buy_vol[i] > sell_vol[i]:
+            escora_type = "SUPORTE"
+            direction = "COMPRA"
+        else:
+            escora_type = "RESISTÊNCIA"
+            direction = "VENDA"
         
-        return None
\ No newline at end of file
+        return {
+            "pattern": "ESCORA_DETECTADA",
+            "level": float(keys[i] * 0.5),
+            "volume": int(volume),
+            "concentration": float(concentration[i]),
+            "type": escora_type,
+            "direction": direction,
+        }
+
+    def _accepts(self, trade_count: int, total_volume) -> bool:
+        """
+        Filtro de entrada: janela com trades suficientes e volume total acima do
+        mínimo (nenhum nível passa de min_volume_threshold se a janela inteira não passa).
+        """
+        return trade_count >= self.MIN_TRADES and total_volume > self.min_volume_threshold
@@ -1,6 +1,6 @@
 # analyzers/patterns/base_pattern_detector.py
 from typing import List, Optional, Dict
-from domain.entities.trade import Trade
+from domain.entities.trade import Trade, TradeSide
 from abc import ABC, abstractmethod
 
 class BasePatternDetector(ABC):
@@ -18,8 +18,16 @@ class BasePatternDetector(ABC):
         if not trades:
             return {'total': 0, 'buy': 0, 'sell': 0}
         
-        buy_volume = sum(t.volume for t in trades if t.side.name == "BUY")
-        sell_volume = sum(t.volume for t in trades if t.side.name == "SELL")
+        # Passada única sobre a janela (UNKNOWN não entra em nenhum lado)
+        buy_volume = 0
+        sell_volume = 0
+        BUY, SELL = TradeSide.BUY, TradeSide.SELL
+        for t in trades:
+            side = t.side
+            if side is BUY:
+                buy_volume += t.volume
+            elif side is SELL:
+                sell_volume += t.volume
         
         return {
             'total': buy_volume + sell_volume,
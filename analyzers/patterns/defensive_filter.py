@@ -1,11 +1,30 @@
 # analyzers/patterns/defensive_filter.py
+from types import MappingProxyType
 from typing import Dict, Tuple, Optional
 from domain.entities.signal import Signal
 from domain.entities.book import OrderBook
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Resultado compartilhado (somente leitura) quando não há layering
+LAYERING_NOT_DETECTED = MappingProxyType({
+    'detected': False,
+    'type': 'LAYERING',
+    'side': None,
+    'description': None
+})
+
+
+def _is_layered(vols: np.ndarray, min_vol: float, max_dev: float, n: int) -> bool:
+    """Verifica se os `n` primeiros níveis têm volume relevante e quase idêntico."""
+    vols = vols[:n]
+    if vols.min() < min_vol:
+        return False
+    avg_vol = vols.mean()
+    return bool(np.max(np.abs(vols - avg_vol)) / avg_vol <= max_dev)
+
 class DefensiveSignalFilter:
     """
     Filtra sinais baseado APENAS no que podemos VER no book.
@@ -60,63 +79,32 @@ class DefensiveSignalFilter:
         Detecta LAYERING - múltiplas ordens com volumes MUITO similares.
         Isso É VISÍVEL no book e É suspeito.
         """
-        result = {
-            'detected': False,
-            'type': 'LAYERING',
-            'side': None,
-            'description': None
-        }
-        
         # Parâmetros mais rigorosos para evitar falsos positivos
         MIN_LEVELS = 4  # Precisa de pelo menos 4 níveis
         MIN_VOLUME = 80  # Volume mínimo relevante
         MAX_DEVIATION = 0.05  # Máximo 5% de desvio entre ordens
         
-        # Verifica BIDS (compra)
-        if len(book.bids) >= MIN_LEVELS:
-            bid_volumes = [level.volume for level in book.bids[:6]]
+        # Verifica BIDS (compra) e depois ASKS (venda)
+        for side, label, levels in (('BID', 'Compra', book.bids), ('ASK', 'Venda', book.asks)):
+            if len(levels) < MIN_LEVELS:
+                continue
             
-            # Só analisa se TODOS os volumes são significativos
-            if all(vol >= MIN_VOLUME for vol in bid_volumes[:MIN_LEVELS]):
-                avg_vol = sum(bid_volumes[:MIN_LEVELS]) / MIN_LEVELS
-                
-                # Verifica se TODOS os níveis são MUITO próximos da média
-                all_similar = all(
-                    abs(vol - avg_vol) / avg_vol <= MAX_DEVIATION 
-                    for vol in bid_volumes[:MIN_LEVELS]
-                )
-                
-                if all_similar:
-                    result['detected'] = True
-                    result['side'] = 'BID'
-                    result['description'] = (
-                        f"BOOK SUSPEITO (Compra): {MIN_LEVELS}+ ordens "
-                        f"IDÊNTICAS de ~{int(avg_vol)} contratos"
-                    )
-                    return result
-        
-        # Verifica ASKS (venda)
-        if len(book.asks) >= MIN_LEVELS:
-            ask_volumes = [level.volume for level in book.asks[:6]]
+            vols = np.fromiter((level.volume for level in levels[:MIN_LEVELS]),
+                               dtype=np.float64, count=MIN_LEVELS)
             
-            if all(vol >= MIN_VOLUME for vol in ask_volumes[:MIN_LEVELS]):
-                avg_vol = sum(ask_volumes[:MIN_LEVELS]) / MIN_LEVELS
-                
-                all_similar = all(
-                    abs(vol - avg_vol) / avg_vol <= MAX_DEVIATION 
-                    for vol in ask_volumes[:MIN_LEVELS]
-                )
-                
-                if all_similar:
-                    result['detected'] = True
-                    result['side'] = 'ASK'
-                    result['description'] = (
-                        f"BOOK SUSPEITO (Venda): {MIN_LEVELS}+ ordens "
+            if _is_layered(vols, MIN_VOLUME, MAX_DEVIATION, MIN_LEVELS):
+                avg_vol = vols.mean()
+                return {
+                    'detected': True,
+                    'type': 'LAYERING',
+                    'side': side,
+                    'description': (
+                        f"BOOK SUSPEITO ({label}): {MIN_LEVELS}+ ordens "
                         f"IDÊNTICAS de ~{int(avg_vol)} contratos"
                     )
-                    return result
+                }
         
-        return result
+        return LAYERING_NOT_DETECTED
     
     def _check_spoofing(self, book: OrderBook) -> Dict:
         """
@@ -135,8 +123,8 @@ class DefensiveSignalFilter:
         
         # Soma volume dos primeiros níveis
         LEVELS_TO_CHECK = 5
-        bid_volume = sum(level.volume for level in book.bids[:LEVELS_TO_CHECK])
-        ask_volume = sum(level.volume for level in book.asks[:LEVELS_TO_CHECK])
+        bid_volume = book.top_bid_volume(LEVELS_TO_CHECK)
+        ask_volume = book.top_ask_volume(LEVELS_TO_CHECK)
         
         if bid_volume == 0 or ask_volume == 0:
             return result
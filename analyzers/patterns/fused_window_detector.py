@@ -0,0 +1,87 @@
+# analyzers/patterns/fused_window_detector.py
+"""
+Execução conjunta de absorção, pressão, spike de volume, momentum e
+iceberg sobre a mesma janela.
+Com Numba disponível a janela é varrida uma única vez por um kernel
+compilado; sem Numba cada detector roda o seu próprio caminho NumPy.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from domain.entities.trade import Trade
+from analyzers._njit import NUMBA_AVAILABLE
+from analyzers.statistics.trade_window import TradeArrays
+from analyzers.patterns.absorption_detector import AbsorptionDetector
+from analyzers.patterns.iceberg_detector import IcebergDetector
+from analyzers.patterns.momentum_analyzer import MomentumAnalyzer
+from analyzers.patterns.pressure_detector import PressureDetector
+from analyzers.patterns.volume_spike_detector import VolumeSpikeDetector
+from analyzers.patterns._fused_kernels import _fused_scan
+
+
+class FusedWindowDetector:
+    """
+    Roda absorção (janela longa), pressão e spike de volume (caudas curtas),
+    iceberg e momentum (janela curta) juntos.
+    """
+
+    def __init__(self, absorption: AbsorptionDetector, iceberg: IcebergDetector,
+                 momentum: MomentumAnalyzer, pressure: PressureDetector,
+                 volume_spike: VolumeSpikeDetector, short_window: int = 50,
+                 pressure_window: int = 20):
+        self.absorption = absorption
+        self.iceberg = iceberg
+        self.momentum = momentum
+        self.pressure = pressure
+        self.volume_spike = volume_spike
+        self.short_window = short_window
+        self.pressure_window = pressure_window
+        self.fused = NUMBA_AVAILABLE
+
+    def detect(self, window: TradeArrays, last_trade: Trade,
+               cvd_roc: float) -> Tuple[Optional[Dict], ...]:
+        """
+        Args:
+            window: janela longa (as demais são os últimos trades dela)
+            last_trade: trade atual para o iceberg
+            cvd_roc: ROC do CVD para o momentum
+
+        Returns:
+            (absorção, pressão, spike, momentum, iceberg) - na ordem de emissão,
+            cada um None se não detectado
+        """
+        prices, volumes, sides = window
+        n = len(prices)
+        ice_start = n - min(self.short_window, n)
+        press_start = n - min(self.pressure_window, n)
+        tail_start = n - min(10, n)  # O spike sempre usa os 10 últimos trades
+        short_prices = prices[ice_start:]
+
+        momentum = self.momentum.detect_divergence_prices(short_prices, cvd_roc)
+
+        if not self.fused:
+            short = TradeArrays(short_prices, volumes[ice_start:], sides[ice_start:])
+            return (
+                self.absorption.detect(window),
+                self.pressure.detect(
+                    TradeArrays(prices[press_start:], volumes[press_start:], sides[press_start:])
+                ),
+                self.volume_spike.detect(short),
+                momentum,
+                self.iceberg.detect(last_trade, short)
+            )
+
+        keys, level_volume, level_buy, first_seen, total, count, at_price, flow = _fused_scan(
+            prices, volumes, sides, ice_start, last_trade.price, last_trade.volume,
+            press_start, tail_start
+        )
+
+        # Cada detector aplica o próprio filtro de entrada sobre os agregados
+        press_all, press_buy, press_sell, tail_all, tail_buy, tail_sell = flow.tolist()
+        return (
+            self.absorption.detect_from_levels(n, keys, first_seen, level_volume, level_buy, total),
+            self.pressure.detect_from_volumes(n - press_start, press_all, press_buy, press_sell),
+            self.volume_spike.detect_from_volumes(n - tail_start, tail_all, tail_buy, tail_sell),
+            momentum,
+            self.iceberg.detect_from_scan(last_trade, short_prices, count, at_price)
+        )
@@ -1,34 +1,44 @@
 # analyzers/patterns/iceberg_detector.py
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 from domain.entities.trade import Trade
+from analyzers.statistics.trade_window import TradeArrays, as_trade_arrays
+from analyzers.patterns._iceberg_kernels import _scan
 
 class IcebergDetector:
     """Detecta ordens do tipo Iceberg (travamento de preço)."""
 
+    __slots__ = ('repetitions', 'min_volume')
+
     def __init__(self, repetitions=3, min_volume=50):
         self.repetitions = repetitions
         self.min_volume = min_volume
 
-    def detect(self, trade: Trade, recent_trades: List[Trade]) -> Optional[Dict]:
+    def detect(self, trade: Trade, recent_trades: Union[List[Trade], TradeArrays]) -> Optional[Dict]:
         """Detecta um iceberg (travamento) baseado no trade atual e no histórico recente."""
-        if trade.volume < self.min_volume or len(recent_trades) < self.repetitions:
+        prices, volumes, _ = as_trade_arrays(recent_trades)
+        if not self._accepts(trade, len(prices)):
             return None
 
-        similar_trades_count = 0
-        total_volume_at_price = 0
-        
         # Iceberg = múltiplas ordens do mesmo tamanho no mesmo preço
         # Indica ordem grande fracionada travando o preço
-        for t in reversed(recent_trades):
-            if abs(t.price - trade.price) < 0.5: # Tolerância de 1 tick
-                total_volume_at_price += t.volume
-                if t.volume == trade.volume:  # Mesmo tamanho = fracionamento
-                    similar_trades_count += 1
-        
+        similar_trades_count, total_volume_at_price = _scan(
+            prices, volumes, trade.price, trade.volume
+        )
+        return self.detect_from_scan(trade, prices, similar_trades_count, total_volume_at_price)
+
+    def detect_from_scan(self, trade: Trade, prices, similar_trades_count: int,
+                         total_volume_at_price: float) -> Optional[Dict]:
+        """
+        Detecta o iceberg a partir dos contadores da varredura de preço sobre a
+        janela `prices`, com o mesmo filtro de entrada de `detect`.
+        """
+        if not self._accepts(trade, len(prices)):
+            return None
+
         if similar_trades_count >= self.repetitions:
             # Detecta se é mais provável ser suporte ou resistência
             # baseado na posição do preço em relação aos trades anteriores
-            avg_price_before = sum(t.price for t in recent_trades[-20:-10]) / 10 if len(recent_trades) >= 20 else trade.price
+            avg_price_before = prices[-20:-10].mean() if len(prices) >= 20 else trade.price
             
             position = "RESISTÊNCIA" if trade.price > avg_price_before else "SUPORTE"
             
@@ -37,8 +47,12 @@ class IcebergDetector:
                 "price": trade.price,
                 "unit_volume": trade.volume,
                 "repetitions": similar_trades_count,
-                "total_volume": total_volume_at_price,
+                "total_volume": int(total_volume_at_price),
                 "position": position  # Não é side, é posição (suporte/resistência)
             }
             
-        return None
\ No newline at end of file
+        return None
+
+    def _accepts(self, trade: Trade, trade_count: int) -> bool:
+        """Filtro de entrada: trade atual grande o bastante e histórico com repetições possíveis."""
+        return trade.volume >= self.min_volume and trade_count >= self.repetitions
\ No newline at end of file
@@ -1,10 +1,13 @@
 # analyzers/patterns/momentum_analyzer.py
 from typing import List, Optional, Dict
+import numpy as np
 from domain.entities.trade import Trade
 
 class MomentumAnalyzer:
     """Detecta divergências e momentum extremo."""
 
+    __slots__ = ('divergence_roc_threshold', 'extreme_roc_threshold')
+
     def __init__(self, divergence_roc_threshold=50, extreme_roc_threshold=100):
         self.divergence_roc_threshold = divergence_roc_threshold
         self.extreme_roc_threshold = extreme_roc_threshold
@@ -14,9 +17,18 @@ class MomentumAnalyzer:
         if not recent_trades or abs(cvd_roc) < self.divergence_roc_threshold:
             return None
 
-        prices = [t.price for t in recent_trades]
-        price_trend = prices[-1] - prices[0]
-        current_price = prices[-1]
+        # Só os extremos da janela importam; não monta a lista de preços
+        return self._evaluate(recent_trades[0].price, recent_trades[-1].price, cvd_roc)
+
+    def detect_divergence_prices(self, prices: np.ndarray, cvd_roc: float) -> Optional[Dict]:
+        """Mesmo que `detect_divergence`, a partir da coluna de preços da janela."""
+        if len(prices) == 0 or abs(cvd_roc) < self.divergence_roc_threshold:
+            return None
+
+        return self._evaluate(float(prices[0]), float(prices[-1]), cvd_roc)
+
+    def _evaluate(self, first_price: float, current_price: float, cvd_roc: float) -> Optional[Dict]:
+        price_trend = current_price - first_price
 
         # Divergência de baixa: preço sobe, fluxo cai
         if price_trend > 1.0 and cvd_roc < -self.divergence_roc_threshold:
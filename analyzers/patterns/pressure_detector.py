@@ -1,28 +1,53 @@
 # analyzers/patterns/pressure_detector.py
-from typing import List, Optional, Dict
-from domain.entities.trade import Trade, TradeSide
+from typing import List, Optional, Dict, Union
+from domain.entities.trade import Trade
+from analyzers.statistics.trade_window import TradeArrays, as_trade_arrays
+from analyzers.patterns._pressure_kernels import _sum_sides
 
 class PressureDetector:
     """Detecta pressão compradora/vendedora baseada em volume direcional."""
     
+    __slots__ = ('threshold', 'min_volume')
+    
     def __init__(self, threshold: float = 0.8, min_volume: int = 100):
         self.threshold = threshold  # 80% do volume em uma direção
         self.min_volume = min_volume
     
-    def detect(self, recent_trades: List[Trade]) -> Optional[Dict]:
+    def detect(self, recent_trades: Union[List[Trade], TradeArrays]) -> Optional[Dict]:
         """Detecta pressão compradora ou vendedora."""
-        if len(recent_trades) < 10:
+        _, volumes, sides = as_trade_arrays(recent_trades)
+        total_volume = int(volumes.sum())
+        if not self._accepts(len(volumes), total_volume):
             return None
         
-        buy_volume = sum(t.volume for t in recent_trades if t.side == TradeSide.BUY)
-        sell_volume = sum(t.volume for t in recent_trades if t.side == TradeSide.SELL)
+        buy_volume, sell_volume = _sum_sides(volumes, sides)
+        return self.detect_from_volumes(len(volumes), total_volume, buy_volume, sell_volume)
+    
+    def detect_from_volumes(self, trade_count: int, total_volume: int,
+                            buy_volume: int, sell_volume: int) -> Optional[Dict]:
+        """
+        Detecta a pressão a partir dos volumes já somados da janela (o total
+        inclui UNKNOWN), com o mesmo filtro de entrada de `detect`.
+        """
+        if not self._accepts(trade_count, total_volume):
+            return None
+        return self._classify(buy_volume, sell_volume)
+    
+    def _accepts(self, trade_count: int, total_volume: int) -> bool:
+        """
+        Filtro de entrada: ao menos 10 trades e volume total (limite superior,
+        inclui UNKNOWN) no mínimo - abaixo dele não vale separar os lados.
+        """
+        return trade_count >= 10 and total_volume >= self.min_volume
+    
+    def _classify(self, buy_volume: int, sell_volume: int) -> Optional[Dict]:
+        """Classifica a pressão a partir dos volumes já somados por lado."""
         total_volume = buy_volume + sell_volume
         
         if total_volume < self.min_volume:
             return None
         
         buy_ratio = buy_volume / total_volume
-        sell_ratio = sell_volume / total_volume
         
         if buy_ratio >= self.threshold:
             return {
@@ -33,7 +58,13 @@ class PressureDetector:
                 "total_volume": total_volume,
                 "direction": "COMPRA"
             }
-        elif sell_ratio >= self.threshold:
+        
+        # Com venda <= compra, sell_ratio <= buy_ratio < threshold: dispensa a divisão
+        if sell_volume <= buy_volume:
+            return None
+        
+        sell_ratio = sell_volume / total_volume
+        if sell_ratio >= self.threshold:
             return {
                 "pattern": "PRESSAO_VENDA",
                 "buy_volume": buy_volume,
@@ -1,53 +1,110 @@
 # analyzers/patterns/volume_spike_detector.py
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
+from bisect import bisect_left, insort
 from collections import deque
-import numpy as np
 from domain.entities.trade import Trade
+from analyzers.statistics.trade_window import TradeArrays, tail_arrays
+from analyzers.patterns._pressure_kernels import _sum_sides
 
 class VolumeSpikeDetector:
     """Detecta picos anormais de volume."""
     
+    __slots__ = ('spike_multiplier', 'history_size', 'history_len', 'baseline_window',
+                 '_recent', '_baseline', '_baseline_sorted')
+    
     def __init__(self, spike_multiplier: float = 3.0, history_size: int = 100):
         self.spike_multiplier = spike_multiplier
-        self.volume_history = deque(maxlen=history_size)
+        self.history_size = history_size
+        self.history_len = 0  # Amostras no histórico (limitado a history_size)
         self.baseline_window = 50
+        
+        # Mediana incremental do baseline (últimos baseline_window volumes):
+        # os 10 volumes mais recentes ficam fora; os demais em lista ordenada
+        self._recent = deque(maxlen=10)
+        self._baseline = deque()
+        self._baseline_sorted = []
     
-    def detect(self, recent_trades: List[Trade]) -> Optional[Dict]:
+    def detect(self, recent_trades: Union[List[Trade], TradeArrays]) -> Optional[Dict]:
         """Detecta spike de volume comparado com baseline."""
-        if not recent_trades:
-            return None
+        # Só os 10 últimos trades são usados (soma e divisão por lado)
+        _, last_volumes, last_sides = tail_arrays(recent_trades, 10)
         
         # Calcula volume dos trades recentes (últimos segundos)
-        current_volume = sum(t.volume for t in recent_trades[-10:])
+        current_volume = int(last_volumes.sum())
+        buy_volume, sell_volume = _sum_sides(last_volumes, last_sides)
+        return self.detect_from_volumes(len(last_volumes), current_volume, buy_volume, sell_volume)
+    
+    def detect_from_volumes(self, trade_count: int, current_volume: int,
+                            buy_volume: int, sell_volume: int) -> Optional[Dict]:
+        """
+        Detecta o spike a partir dos volumes já somados dos últimos 10 trades.
+        Registra o volume no histórico do baseline, como `detect`.
+        """
+        if trade_count == 0:
+            return None
+        
+        baseline = self._observe(current_volume)
+        if baseline is None:
+            return None
         
+        # Determina direção do spike
+        return self._build_signal(current_volume, baseline, buy_volume, sell_volume)
+    
+    def _observe(self, current_volume: int) -> Optional[float]:
+        """Registra o volume no histórico; retorna o baseline se houver spike."""
         # Adiciona ao histórico
-        self.volume_history.append(current_volume)
+        if self.history_len < self.history_size:
+            self.history_len += 1
+        self._push_volume(current_volume)
         
-        if len(self.volume_history) < self.baseline_window:
+        if self.history_len < self.baseline_window:
             return None
         
         # Calcula baseline (mediana para robustez)
-        baseline_volumes = list(self.volume_history)[-self.baseline_window:-10]
-        if not baseline_volumes:
+        if not self._baseline_sorted:
             return None
             
-        baseline = np.median(baseline_volumes)
+        baseline = self._baseline_median()
         
         if baseline > 0 and current_volume > baseline * self.spike_multiplier:
-            # Determina direção do spike
-            buy_volume = sum(t.volume for t in recent_trades[-10:] if t.side.value == "BUY")
-            sell_volume = sum(t.volume for t in recent_trades[-10:] if t.side.value == "SELL")
-            
-            direction = "COMPRA" if buy_volume > sell_volume else "VENDA"
+            return baseline
+        
+        return None
+    
+    def _build_signal(self, current_volume: int, baseline: float,
+                      buy_volume: int, sell_volume: int) -> Dict:
+        """Monta o resultado do spike."""
+        direction = "COMPRA" if buy_volume > sell_volume else "VENDA"
+        
+        return {
+            "pattern": "VOLUME_SPIKE",
+            "current_volume": current_volume,
+            "baseline": baseline,
+            "multiplier": current_volume / baseline,
+            "direction": direction,
+            "buy_volume": buy_volume,
+            "sell_volume": sell_volume
+        }
+    
+    def _push_volume(self, volume: int) -> None:
+        """Atualiza a janela do baseline em O(log n) + deslocamento da lista ordenada."""
+        if len(self._recent) == self._recent.maxlen:
+            # O volume mais antigo dos 10 recentes entra no baseline
+            entering = self._recent[0]
+            self._baseline.append(entering)
+            insort(self._baseline_sorted, entering)
             
-            return {
-                "pattern": "VOLUME_SPIKE",
-                "current_volume": current_volume,
-                "baseline": baseline,
-                "multiplier": current_volume / baseline,
-                "direction": direction,
-                "buy_volume": buy_volume,
-                "sell_volume": sell_volume
-            }
-        
-        return None
\ No newline at end of file
+            if len(self._baseline) > self.baseline_window - 10:
+                leaving = self._baseline.popleft()
+                del self._baseline_sorted[bisect_left(self._baseline_sorted, leaving)]
+        
+        self._recent.append(volume)
+    
+    def _baseline_median(self) -> float:
+        """Mediana da janela do baseline (mesmo resultado de np.median)."""
+        values = self._baseline_sorted
+        n = len(values)
+        mid = n // 2
+        if n % 2:
+            return float(values[mid])
+        return (values[mid - 1] + values[mid]) / 2
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Kernel compilado das análises de preço (tendência, volatilidade e momentum) do MarketRegimeDetector."""
+
+import math
+from typing import NamedTuple
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+class PriceWindowStats(NamedTuple):
+    """Métricas da janela de preços produzidas por `_regime_kernel`."""
+    trend_strength: float
+    trend_direction: int
+    trend_slope: float        # slope normalizado pelo preço médio
+    ma_confirmation: bool
+    volatility: float         # realizada, anualizada
+    parkinson: float
+    atr_pct: float
+    rsi: float
+    roc: float
+    macd_histogram: float
+
+
+@njit(cache=True)
+def _regime_kernel(prices, threshold, short_window=60):
+    """
+    Varre a janela de preços uma única vez e calcula, ao mesmo tempo:
+      - tendência sobre a janela toda: regressão linear (momentos de x em
+        forma fechada, y à la Welford), R² e confirmação por médias 20/50;
+      - volatilidade sobre os últimos `short_window`: desvio dos retornos,
+        Parkinson em blocos de 5 e ATR dos 20 últimos ranges;
+      - momentum sobre os últimos `short_window`: RSI, ROC de 10 períodos
+        e histograma MACD(12, 26, 9).
+
+    Requer pelo menos 20 preços. Aceita float32 (colunas do detector) ou
+    float64; a janela é promovida para float64 antes das contas.
+
+    Returns:
+        Tupla na ordem dos campos de PriceWindowStats
+    """
+    prices = prices.astype(np.float64)
+    n = prices.size
+    m = min(short_window, n)
+    s = n - m  # Início da janela curta
+
+    # Tendência
+    mean_x = (n - 1) / 2.0
+    sxx = n * (n * n - 1) / 12.0  # Soma de (i - mean_x)²
+    y0 = prices[0]  # Referência de Sxy (Σ(i - mean_x) = 0)
+    mean_y = 0.0
+    sxy = 0.0
+    syy = 0.0
+    sum_20 = 0.0
+    sum_50 = 0.0
+
+    # Volatilidade
+    short_sum = 0.0
+    ret_count = 0
+    ret_mean = 0.0
+    ret_m2 = 0.0
+    block_high = 0.0
+    block_low = 0.0
+    block_sum = 0.0
+    n_blocks = (m - 5 + 4) // 5  # Blocos iniciados em range(0, m - 5, 5)
+    hl_sum = 0.0
+    tr_start = max(s + 1, n - 20)
+    tr_sum = 0.0
+
+    # Momentum
+    gain_sum = 0.0
+    loss_sum = 0.0
+    k_12 = 2.0 / 13
+    k_26 = 2.0 / 27
+    k_9 = 2.0 / 10
+    ema_12 = prices[s]
+    ema_26 = prices[s]
+    macd = 0.0
+    signal_line = 0.0
+
+    for i in range(n):
+        y = prices[i]
+
+        dy = y - mean_y
+        mean_y += dy / (i + 1)
+        syy += dy * (y - mean_y)
+        sxy += (i - mean_x) * (y - y0)
+        if i >= n - 50:
+            sum_50 += y
+            if i >= n - 20:
+                sum_20 += y
+
+        if i < s:
+            continue
+
+        j = i - s
+        short_sum += y
+
+        # Parkinson: blocos de 5 alinhados ao início da janela curta
+        b = j % 5
+        if b == 0:
+            block_high = y
+            block_low = y
+            block_sum = y
+        else:
+            block_high = max(block_high, y)
+            block_low = min(block_low, y)
+            block_sum += y
+        if b == 4 and j // 5 < n_blocks:
+            hl_sum += (block_high - block_low) / (block_sum / 5)
+
+        if j == 0:
+            continue
+
+        prev = prices[i - 1]
+        d = y - prev
+
+        # Retornos (média e variância à la Welford)
+        r = d / prev
+        ret_count += 1
+        dr = r - ret_mean
+        ret_mean += dr / ret_count
+        ret_m2 += dr * (r - ret_mean)
+
+        if i >= tr_start:
+            tr_sum += abs(d)
+
+        gain_sum += max(d, 0.0)
+        loss_sum += max(-d, 0.0)
+
+        ema_12 = (y * k_12) + (ema_12 * (1 - k_12))
+        ema_26 = (y * k_26) + (ema_26 * (1 - k_26))
+        macd = ema_12 - ema_26
+        signal_line = (macd * k_9) + (signal_line * (1 - k_9))
+
+    # Tendência
+    slope = sxy / sxx
+    normalized_slope = slope / mean_y if mean_y > 0 else 0.0
+    ss_tot = syy
+    ss_res = max(ss_tot - slope * sxy, 0.0)
+    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0.0
+    sma_20 = sum_20 / 20
+    sma_50 = sum_50 / 50 if n >= 50 else sma_20
+    ma_signal = 1 if sma_20 > sma_50 else -1 if sma_20 < sma_50 else 0
+    direction = 1 if normalized_slope > threshold else -1 if normalized_slope < -threshold else 0
+    if direction != 0 and ma_signal == direction:
+        strength = min(r_squared * 1.2, 1.0)  # Bonus por confirmação
+    else:
+        strength = r_squared * 0.8
+
+    # Volatilidade
+    volatility = math.sqrt(ret_m2 / ret_count) * math.sqrt(252.0)
+    parkinson = hl_sum / n_blocks if n_blocks > 0 else 0.0
+    atr = tr_sum / (n - tr_start)
+    atr_pct = (atr / (short_sum / m)) * 100
+
+    # Momentum
+    avg_gain = gain_sum / (m - 1)
+    avg_loss = loss_sum / (m - 1)
+    rs = avg_gain / avg_loss if avg_loss > 0 else 100.0
+    rsi = 100 - (100 / (1 + rs))
+    roc = ((prices[n - 1] - prices[n - 10]) / prices[n - 10]) * 100
+    macd_histogram = macd - signal_line if m >= 26 else 0.0
+
+    return (strength, direction, normalized_slope, ma_signal == direction,
+            volatility, parkinson, atr_pct, rsi, roc, macd_histogram)
+
+
+_regime_kernel = select_kernel(
+    _regime_kernel, None, (np.linspace(100.0, 101.0, 100, dtype=np.float32), 0.001)
+)
@@ -1,14 +1,18 @@
 # analyzers/regimes/market_regime_detector.py
 import numpy as np
+from dataclasses import dataclass
 from typing import Dict, List, Tuple
 from datetime import datetime
-from collections import deque
 from enum import Enum
 import logging
+import time
 
-from domain.entities.trade import Trade
 from domain.entities.book import OrderBook
 from domain.entities.market_data import MarketData
+from analyzers.statistics.ring_buffer import RingBuffer
+from analyzers.statistics.trade_window import TradeArrays, trade_arrays, trade_timestamps, timestamp_us
+from analyzers.regimes._regime_kernels import PriceWindowStats, _regime_kernel
+from analyzers.patterns._pressure_kernels import _sum_sides
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +43,31 @@ class LiquidityLevel(str, Enum):
     DEEP = "DEEP"
 
 
+# Posição de cada regime no vetor de scores (ordem da enum = desempate do max)
+_REGIMES = tuple(MarketRegime)
+_TRENDING_UP, _TRENDING_DOWN, _RANGING, _VOLATILE, _QUIET, _BREAKOUT, _REVERSAL = range(len(_REGIMES))
+
+
+@dataclass(slots=True)
+class RegimeMetrics:
+    """Métricas derivadas do regime de um símbolo."""
+    trend_strength: float = 0.0
+    trend_direction: int = 0
+    volatility: VolatilityLevel = VolatilityLevel.NORMAL
+    volatility_value: float = 0.0
+    liquidity: LiquidityLevel = LiquidityLevel.NORMAL
+    liquidity_score: float = 0.0
+    momentum: float = 0.0
+    market_depth_imbalance: float = 0.0
+    price_acceleration: float = 0.0
+    volume_profile_skew: float = 0.0
+    microstructure_score: float = 0.0
+    
+    def get(self, key: str, default=None):
+        """Leitura no estilo dict, como no antigo dicionário de métricas."""
+        return getattr(self, key, default)
+
+
 class MarketRegimeDetector:
     """
     Detecta o regime atual do mercado analisando múltiplos fatores
@@ -54,25 +83,27 @@ class MarketRegimeDetector:
         self.lookback_period = lookback_period
         self.update_interval = update_interval
         
-        # Histórico de dados por símbolo
+        # Histórico de dados por símbolo - colunas NumPy em buffers circulares
+        # (preços/spreads em float32 - meio tick é exato; volumes e
+        # timestamps em µs, int64 - mesma escala de trade_timestamps)
         self.price_history = {
-            'WDO': deque(maxlen=1000),
-            'DOL': deque(maxlen=1000)
+            'WDO': self._create_price_buffers(1000),
+            'DOL': self._create_price_buffers(1000)
         }
         
         self.volume_history = {
-            'WDO': deque(maxlen=1000),
-            'DOL': deque(maxlen=1000)
+            'WDO': self._create_volume_buffers(1000),
+            'DOL': self._create_volume_buffers(1000)
         }
         
         self.spread_history = {
-            'WDO': deque(maxlen=500),
-            'DOL': deque(maxlen=500)
+            'WDO': self._create_spread_buffers(500),
+            'DOL': self._create_spread_buffers(500)
         }
         
         self.trade_flow = {
-            'WDO': deque(maxlen=2000),
-            'DOL': deque(maxlen=2000)
+            'WDO': self._create_trade_flow_buffers(2000),
+            'DOL': self._create_trade_flow_buffers(2000)
         }
         
         # Regime atual
@@ -86,14 +117,18 @@ class MarketRegimeDetector:
             'DOL': 0.5
         }
         
+        # Último regime registrado em log por símbolo
+        self._last_logged_regime = {}
+        
         # Métricas derivadas
         self.metrics = {
             'WDO': self._create_empty_metrics(),
             'DOL': self._create_empty_metrics()
         }
         
-        # Última atualização
-        self.last_update = datetime.now()
+        # Última atualização (relógio monotônico, em ns)
+        self.update_interval_ns = update_interval * 1_000_000_000
+        self.last_update_ns = time.monotonic_ns()
         
         # Parâmetros adaptativos
         self.adaptive_params = {
@@ -102,23 +137,59 @@ class MarketRegimeDetector:
             'volume_spike_threshold': 3.0,
             'liquidity_depth_levels': 5
         }
+        
+        # Cache das análises mais caras: só recalcula após N novas amostras
+        # (trades do fluxo ou snapshots de book, que ambas leem)
+        self.analysis_refresh_samples = {
+            'liquidity': 5,
+            'microstructure': 3
+        }
+        self._analysis_cache = {
+            'WDO': {},
+            'DOL': {}
+        }
     
-    def _create_empty_metrics(self) -> Dict:
-        """Cria estrutura vazia de métricas."""
+    @staticmethod
+    def _create_price_buffers(capacity: int) -> Dict[str, RingBuffer]:
+        """Colunas do histórico de preços (um registro por trade)."""
+        return {
+            'prices': RingBuffer(capacity, np.float32),
+            'volumes': RingBuffer(capacity, np.int64),
+            'timestamps': RingBuffer(capacity, np.int64)
+        }
+    
+    @staticmethod
+    def _create_volume_buffers(capacity: int) -> Dict[str, RingBuffer]:
+        """Colunas do histórico de volume (um registro por atualização)."""
+        return {
+            'volumes': RingBuffer(capacity, np.int64),
+            'timestamps': RingBuffer(capacity, np.int64)
+        }
+    
+    @staticmethod
+    def _create_spread_buffers(capacity: int) -> Dict[str, RingBuffer]:
+        """Colunas do histórico de spread (um registro por book)."""
+        return {
+            'spreads': RingBuffer(capacity, np.float32),
+            'bid_sizes': RingBuffer(capacity, np.int64),
+            'ask_sizes': RingBuffer(capacity, np.int64),
+            'timestamps': RingBuffer(capacity, np.int64)
+        }
+    
+    @staticmethod
+    def _create_trade_flow_buffers(capacity: int) -> Dict[str, RingBuffer]:
+        """Colunas do fluxo de trades (um registro por trade)."""
         return {
-            'trend_strength': 0.0,
-            'trend_direction': 0,
-            'volatility': VolatilityLevel.NORMAL,
-            'volatility_value': 0.0,
-            'liquidity': LiquidityLevel.NORMAL,
-            'liquidity_score': 0.0,
-            'momentum': 0.0,
-            'market_depth_imbalance': 0.0,
-            'price_acceleration': 0.0,
-            'volume_profile_skew': 0.0,
-            'microstructure_score': 0.0
+            'prices': RingBuffer(capacity, np.float32),
+            'volumes': RingBuffer(capacity, np.int64),
+            'sides': RingBuffer(capacity, np.int8),
+            'timestamps': RingBuffer(capacity, np.int64)
         }
     
+    def _create_empty_metrics(self) -> RegimeMetrics:
+        """Cria estrutura vazia de métricas."""
+        return RegimeMetrics()
+    
     def update(self, market_data: MarketData) -> Dict[str, MarketRegime]:
         """
         Atualiza a detecção de regime com novos dados de mercado.
@@ -126,220 +197,169 @@ class MarketRegimeDetector:
         Returns:
             Dict com o regime atual para cada símbolo
         """
-        now = datetime.now()
+        now_ns = time.monotonic_ns()
         
         # Atualiza apenas no intervalo definido
-        if (now - self.last_update).seconds < self.update_interval:
+        if now_ns - self.last_update_ns < self.update_interval_ns:
             return self.current_regime
         
+        # Relógio de parede capturado uma vez: as atualizações do ciclo são simultâneas
+        wall_us = timestamp_us(datetime.now())
+        
         for symbol, data in market_data.data.items():
             if data.trades:
-                self._update_price_history(symbol, data.trades)
-                self._update_volume_history(symbol, data.trades)
-                self._update_trade_flow(symbol, data.trades)
+                # Extrai as colunas uma única vez e compartilha entre os históricos
+                columns = trade_arrays(data.trades)
+                timestamps = trade_timestamps(data.trades)
+                self._update_price_history(symbol, columns, timestamps)
+                self._update_volume_history(symbol, columns, wall_us)
+                self._update_trade_flow(symbol, columns, timestamps)
             
             if data.book:
-                self._update_spread_history(symbol, data.book)
+                self._update_spread_history(symbol, data.book, wall_us)
             
             # Analisa regime se houver dados suficientes
-            if len(self.price_history[symbol]) >= 30:
+            if len(self.price_history[symbol]['prices']) >= 30:
                 self._analyze_market_regime(symbol)
         
-        self.last_update = now
+        self.last_update_ns = now_ns
         return self.current_regime
     
-    def _update_price_history(self, symbol: str, trades: List[Trade]):
+    def _update_price_history(self, symbol: str, trades: TradeArrays, timestamps: np.ndarray):
         """Atualiza histórico de preços."""
-        for trade in trades:
-            self.price_history[symbol].append({
-                'price': trade.price,
-                'volume': trade.volume,
-                'timestamp': trade.timestamp
-            })
+        history = self.price_history[symbol]
+        history['prices'].append_batch(trades.prices)
+        history['volumes'].append_batch(trades.volumes)
+        history['timestamps'].append_batch(timestamps)
     
-    def _update_volume_history(self, symbol: str, trades: List[Trade]):
+    def _update_volume_history(self, symbol: str, trades: TradeArrays, timestamp: int):
         """Atualiza histórico de volume."""
-        total_volume = sum(t.volume for t in trades)
+        total_volume = int(trades.volumes.sum())
         if total_volume > 0:
-            self.volume_history[symbol].append({
-                'volume': total_volume,
-                'timestamp': datetime.now()
-            })
+            history = self.volume_history[symbol]
+            history['volumes'].append(total_volume)
+            history['timestamps'].append(timestamp)
     
-    def _update_spread_history(self, symbol: str, book: OrderBook):
+    def _update_spread_history(self, symbol: str, book: OrderBook, timestamp: int):
         """Atualiza histórico de spread."""
         if book.best_bid > 0 and book.best_ask > 0:
-            spread = book.best_ask - book.best_bid
-            self.spread_history[symbol].append({
-                'spread': spread,
-                'bid_size': book.bids[0].volume if book.bids else 0,
-                'ask_size': book.asks[0].volume if book.asks else 0,
-                'timestamp': datetime.now()
-            })
+            history = self.spread_history[symbol]
+            history['spreads'].append(book.best_ask - book.best_bid)
+            history['bid_sizes'].append(book.bids[0].volume if book.bids else 0)
+            history['ask_sizes'].append(book.asks[0].volume if book.asks else 0)
+            history['timestamps'].append(timestamp)
     
-    def _update_trade_flow(self, symbol: str, trades: List[Trade]):
+    def _update_trade_flow(self, symbol: str, trades: TradeArrays, timestamps: np.ndarray):
         """Atualiza fluxo de trades para análise de microestrutura."""
-        for trade in trades:
-            self.trade_flow[symbol].append({
-                'price': trade.price,
-                'volume': trade.volume,
-                'side': trade.side.value,
-                'timestamp': trade.timestamp
-            })
+        flow = self.trade_flow[symbol]
+        flow['prices'].append_batch(trades.prices)
+        flow['volumes'].append_batch(trades.volumes)
+        flow['sides'].append_batch(trades.sides)
+        flow['timestamps'].append_batch(timestamps)
     
     def _analyze_market_regime(self, symbol: str):
         """Analisa e determina o regime de mercado atual."""
-        # 1. Análise de Tendência
-        trend_analysis = self._analyze_trend(symbol)
-        self.metrics[symbol]['trend_strength'] = trend_analysis['strength']
-        self.metrics[symbol]['trend_direction'] = trend_analysis['direction']
-        
-        # 2. Análise de Volatilidade
-        volatility_analysis = self._analyze_volatility(symbol)
-        self.metrics[symbol]['volatility'] = volatility_analysis['level']
-        self.metrics[symbol]['volatility_value'] = volatility_analysis['value']
+        # 1, 2 e 4. Tendência, volatilidade e momentum (uma varredura dos preços)
+        metrics = self.metrics[symbol]
+        stats = self._analyze_price_window(symbol)
+        metrics.trend_strength = stats.trend_strength
+        metrics.trend_direction = stats.trend_direction
+        metrics.volatility = self._classify_volatility(stats.volatility, stats.atr_pct)
+        metrics.volatility_value = stats.volatility
+        metrics.momentum = self._combine_momentum(
+            stats.rsi, stats.roc, stats.macd_histogram
+        )
         
         # 3. Análise de Liquidez
         liquidity_analysis = self._analyze_liquidity(symbol)
-        self.metrics[symbol]['liquidity'] = liquidity_analysis['level']
-        self.metrics[symbol]['liquidity_score'] = liquidity_analysis['score']
-        
-        # 4. Análise de Momentum
-        momentum = self._calculate_momentum(symbol)
-        self.metrics[symbol]['momentum'] = momentum
+        metrics.liquidity = liquidity_analysis['level']
+        metrics.liquidity_score = liquidity_analysis['score']
         
         # 5. Análise de Microestrutura
         microstructure = self._analyze_microstructure(symbol)
-        self.metrics[symbol]['microstructure_score'] = microstructure['score']
-        self.metrics[symbol]['market_depth_imbalance'] = microstructure['depth_imbalance']
+        metrics.microstructure_score = microstructure['score']
+        metrics.market_depth_imbalance = microstructure['depth_imbalance']
         
         # 6. Determina o regime baseado nas análises
         regime, confidence = self._determine_regime(symbol)
         self.current_regime[symbol] = regime
         self.regime_confidence[symbol] = confidence
         
-        # Log mudanças significativas
-        if confidence > 0.7:
-            logger.info(f"{symbol} - Regime: {regime.value} (Confiança: {confidence:.2f})")
+        # Log apenas de transições com confiança alta
+        if confidence > 0.7 and regime is not self._last_logged_regime.get(symbol):
+            self._last_logged_regime[symbol] = regime
+            logger.info("%s - Regime: %s (Confiança: %.2f)", symbol, regime.value, confidence)
     
-    def _analyze_trend(self, symbol: str) -> Dict:
-        """Analisa a tendência de preço."""
-        prices = [p['price'] for p in list(self.price_history[symbol])[-100:]]
-        
-        if len(prices) < 20:
-            return {'strength': 0, 'direction': 0}
-        
-        # Regressão linear para tendência
-        x = np.arange(len(prices))
-        slope, intercept = np.polyfit(x, prices, 1)
-        
-        # Normaliza o slope pelo preço médio
-        avg_price = np.mean(prices)
-        normalized_slope = slope / avg_price if avg_price > 0 else 0
-        
-        # R-squared para força da tendência
-        y_pred = slope * x + intercept
-        ss_res = np.sum((prices - y_pred) ** 2)
-        ss_tot = np.sum((prices - np.mean(prices)) ** 2)
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-        
-        # Média móvel para confirmação
-        sma_20 = np.mean(prices[-20:])
-        sma_50 = np.mean(prices[-50:]) if len(prices) >= 50 else sma_20
-        ma_signal = 1 if sma_20 > sma_50 else -1 if sma_20 < sma_50 else 0
-        
-        # Combina sinais
-        direction = 1 if normalized_slope > self.adaptive_params['trend_threshold'] else \
-                   -1 if normalized_slope < -self.adaptive_params['trend_threshold'] else 0
-        
-        # Ajusta direção com confirmação de MA
-        if direction != 0 and ma_signal == direction:
-            strength = min(r_squared * 1.2, 1.0)  # Bonus por confirmação
-        else:
-            strength = r_squared * 0.8
-        
-        return {
-            'strength': strength,
-            'direction': direction,
-            'slope': normalized_slope,
-            'ma_confirmation': ma_signal == direction
-        }
+    def _analyze_price_window(self, symbol: str) -> PriceWindowStats:
+        """Tendência, volatilidade e momentum em uma única varredura dos últimos 100 preços."""
+        prices = self.price_history[symbol]['prices'].last(100)
+        return PriceWindowStats._make(
+            _regime_kernel(prices, self.adaptive_params['trend_threshold'])
+        )
     
-    def _analyze_volatility(self, symbol: str) -> Dict:
-        """Analisa a volatilidade do mercado."""
-        prices = [p['price'] for p in list(self.price_history[symbol])[-60:]]
-        
-        if len(prices) < 20:
-            return {'level': VolatilityLevel.NORMAL, 'value': 0}
-        
-        # Calcula retornos
-        returns = np.diff(prices) / prices[:-1]
-        
-        # Volatilidade realizada
-        volatility = np.std(returns) * np.sqrt(252)  # Anualizada
-        
-        # Volatilidade de Parkinson (high-low)
-        period_high_low = []
-        for i in range(0, len(prices)-5, 5):
-            period_prices = prices[i:i+5]
-            if period_prices:
-                hl_vol = (max(period_prices) - min(period_prices)) / np.mean(period_prices)
-                period_high_low.append(hl_vol)
-        
-        parkinson_vol = np.mean(period_high_low) if period_high_low else 0
-        
-        # ATR-like measure
-        true_ranges = []
-        for i in range(1, len(prices)):
-            tr = abs(prices[i] - prices[i-1])
-            true_ranges.append(tr)
-        
-        atr = np.mean(true_ranges[-20:]) if true_ranges else 0
-        atr_pct = (atr / np.mean(prices)) * 100 if prices else 0
-        
-        # Classifica volatilidade
+    @staticmethod
+    def _classify_volatility(volatility: float, atr_pct: float) -> VolatilityLevel:
+        """Classifica a volatilidade realizada e o ATR percentual."""
         if volatility < 0.15 and atr_pct < 0.5:
-            level = VolatilityLevel.LOW
+            return VolatilityLevel.LOW
         elif volatility < 0.25 and atr_pct < 1.0:
-            level = VolatilityLevel.NORMAL
+            return VolatilityLevel.NORMAL
         elif volatility < 0.40 and atr_pct < 2.0:
-            level = VolatilityLevel.HIGH
-        else:
-            level = VolatilityLevel.EXTREME
+            return VolatilityLevel.HIGH
+        return VolatilityLevel.EXTREME
+    
+    @staticmethod
+    def _combine_momentum(rsi: float, roc: float, macd_histogram: float) -> float:
+        """Combina RSI, ROC e MACD em um momentum entre -1 e 1."""
+        rsi_momentum = (rsi - 50) / 50
+        roc_momentum = np.tanh(roc / 10)  # Tanh para limitar entre -1 e 1
+        macd_momentum = np.tanh(macd_histogram)
         
-        return {
-            'level': level,
-            'value': volatility,
-            'parkinson': parkinson_vol,
-            'atr_pct': atr_pct
-        }
+        return np.mean([rsi_momentum, roc_momentum, macd_momentum])
+    
+    def _cached_analysis(self, symbol: str, name: str, compute) -> Dict:
+        """Reaproveita o resultado de `compute` enquanto chegarem poucas amostras novas."""
+        written = (
+            self.trade_flow[symbol]['prices'].written
+            + self.spread_history[symbol]['spreads'].written
+        )
+        cached = self._analysis_cache[symbol].get(name)
+        if cached is not None and written - cached[0] < self.analysis_refresh_samples[name]:
+            return cached[1]
+        
+        result = compute(symbol)
+        self._analysis_cache[symbol][name] = (written, result)
+        return result
     
     def _analyze_liquidity(self, symbol: str) -> Dict:
+        """Analisa a liquidez do mercado (com cache por número de amostras)."""
+        return self._cached_analysis(symbol, 'liquidity', self._compute_liquidity)
+    
+    def _compute_liquidity(self, symbol: str) -> Dict:
         """Analisa a liquidez do mercado."""
         # Volume médio
-        recent_volumes = [v['volume'] for v in list(self.volume_history[symbol])[-30:]]
-        avg_volume = np.mean(recent_volumes) if recent_volumes else 0
+        recent_volumes = self.volume_history[symbol]['volumes'].last(30)
+        avg_volume = np.mean(recent_volumes) if len(recent_volumes) else 0
         
         # Spread médio
-        recent_spreads = [s['spread'] for s in list(self.spread_history[symbol])[-30:]]
-        avg_spread = np.mean(recent_spreads) if recent_spreads else 0
+        spread_history = self.spread_history[symbol]
+        recent_spreads = spread_history['spreads'].last(30)
+        avg_spread = np.mean(recent_spreads, dtype=np.float64) if len(recent_spreads) else 0
         
         # Profundidade do book (bid/ask sizes)
-        recent_depths = [(s['bid_size'] + s['ask_size']) 
-                        for s in list(self.spread_history[symbol])[-30:]]
-        avg_depth = np.mean(recent_depths) if recent_depths else 0
+        recent_depths = spread_history['bid_sizes'].last(30) + spread_history['ask_sizes'].last(30)
+        avg_depth = np.mean(recent_depths) if len(recent_depths) else 0
         
-        # Kyle's Lambda (impacto de preço)
-        price_impacts = []
-        trades = list(self.trade_flow[symbol])[-50:]
+        # Kyle's Lambda (impacto de preço por unidade de volume)
+        flow = self.trade_flow[symbol]
+        prices = flow['prices'].last(50)
+        volumes = flow['volumes'].last(50)[1:]
         
-        for i in range(1, len(trades)):
-            if trades[i]['volume'] > 0:
-                price_change = abs(trades[i]['price'] - trades[i-1]['price'])
-                impact = price_change / trades[i]['volume']
-                price_impacts.append(impact)
-        
-        avg_impact = np.mean(price_impacts) if price_impacts else 0
+        has_volume = volumes > 0
+        if has_volume.any():
+            avg_impact = np.mean(np.abs(np.diff(prices))[has_volume] / volumes[has_volume])
+        else:
+            avg_impact = 0
         
         # Score de liquidez (0-1)
         volume_score = min(avg_volume / 100, 1.0)  # Normalizado para 100
@@ -366,74 +386,25 @@ class MarketRegimeDetector:
             'price_impact': avg_impact
         }
     
-    def _calculate_momentum(self, symbol: str) -> float:
-        """Calcula o momentum do mercado."""
-        prices = [p['price'] for p in list(self.price_history[symbol])[-60:]]
-        
-        if len(prices) < 20:
-            return 0.0
-        
-        # RSI
-        deltas = np.diff(prices)
-        gains = deltas[deltas > 0]
-        losses = -deltas[deltas < 0]
-        
-        avg_gain = np.mean(gains) if len(gains) > 0 else 0
-        avg_loss = np.mean(losses) if len(losses) > 0 else 0
-        
-        rs = avg_gain / avg_loss if avg_loss > 0 else 100
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Rate of Change
-        if len(prices) >= 10:
-            roc = ((prices[-1] - prices[-10]) / prices[-10]) * 100
-        else:
-            roc = 0
-        
-        # MACD-like indicator
-        if len(prices) >= 26:
-            ema_12 = self._calculate_ema(prices[-26:], 12)
-            ema_26 = self._calculate_ema(prices[-26:], 26)
-            macd = ema_12 - ema_26
-            signal_line = self._calculate_ema([macd], 9)
-            macd_histogram = macd - signal_line
-        else:
-            macd_histogram = 0
-        
-        # Normaliza momentum (-1 a 1)
-        rsi_momentum = (rsi - 50) / 50
-        roc_momentum = np.tanh(roc / 10)  # Tanh para limitar entre -1 e 1
-        macd_momentum = np.tanh(macd_histogram)
-        
-        # Combina indicadores
-        momentum = np.mean([rsi_momentum, roc_momentum, macd_momentum])
-        
-        return momentum
-    
-    def _calculate_ema(self, data: List[float], period: int) -> float:
-        """Calcula Exponential Moving Average."""
-        if not data or period <= 0:
-            return 0
-        
-        multiplier = 2 / (period + 1)
-        ema = data[0]
-        
-        for price in data[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
-        
-        return ema
-    
     def _analyze_microstructure(self, symbol: str) -> Dict:
+        """Analisa a microestrutura do mercado (com cache por número de amostras)."""
+        return self._cached_analysis(symbol, 'microstructure', self._compute_microstructure)
+    
+    def _compute_microstructure(self, symbol: str) -> Dict:
         """Analisa a microestrutura do mercado."""
-        trades = list(self.trade_flow[symbol])[-100:]
-        spreads = list(self.spread_history[symbol])[-50:]
-        
-        if len(trades) < 20 or len(spreads) < 10:
+        flow = self.trade_flow[symbol]
+        spread_history = self.spread_history[symbol]
+        prices = flow['prices'].last(100)
+        volumes = flow['volumes'].last(100)
+        sides = flow['sides'].last(100)
+        bid_sizes = spread_history['bid_sizes'].last(50)
+        ask_sizes = spread_history['ask_sizes'].last(50)
+        
+        if len(prices) < 20 or len(bid_sizes) < 10:
             return {'score': 0.5, 'depth_imbalance': 0}
         
-        # Order Flow Imbalance
-        buy_volume = sum(t['volume'] for t in trades if t['side'] == 'BUY')
-        sell_volume = sum(t['volume'] for t in trades if t['side'] == 'SELL')
+        # Order Flow Imbalance (uma passada, UNKNOWN fica de fora)
+        buy_volume, sell_volume = _sum_sides(volumes, sides)
         total_volume = buy_volume + sell_volume
         
         if total_volume > 0:
@@ -441,30 +412,24 @@ class MarketRegimeDetector:
         else:
             ofi = 0
         
-        # Depth Imbalance
-        recent_imbalances = []
-        for spread in spreads:
-            total_depth = spread['bid_size'] + spread['ask_size']
-            if total_depth > 0:
-                imbalance = (spread['bid_size'] - spread['ask_size']) / total_depth
-                recent_imbalances.append(imbalance)
-        
-        avg_depth_imbalance = np.mean(recent_imbalances) if recent_imbalances else 0
+        # Depth Imbalance (ignora snapshots com book vazio no topo)
+        total_depth = bid_sizes + ask_sizes
+        has_depth = total_depth > 0
+        if has_depth.any():
+            avg_depth_imbalance = np.mean(
+                (bid_sizes - ask_sizes)[has_depth] / total_depth[has_depth]
+            )
+        else:
+            avg_depth_imbalance = 0
         
         # Trade Size Distribution
-        trade_sizes = [t['volume'] for t in trades]
-        if trade_sizes:
-            size_cv = np.std(trade_sizes) / np.mean(trade_sizes)  # Coefficient of variation
-        else:
-            size_cv = 0
+        size_cv = np.std(volumes) / np.mean(volumes)  # Coefficient of variation
         
         # Price Discovery (velocidade de ajuste de preço)
-        price_changes = []
-        for i in range(1, len(trades)):
-            if trades[i]['price'] != trades[i-1]['price']:
-                price_changes.append(abs(trades[i]['price'] - trades[i-1]['price']))
+        price_changes = np.abs(np.diff(prices))
+        price_changes = price_changes[price_changes > 0]
         
-        avg_tick_size = np.mean(price_changes) if price_changes else 0
+        avg_tick_size = np.mean(price_changes, dtype=np.float64) if price_changes.size else 0
         
         # Microstructure score (0-1)
         ofi_score = abs(ofi)  # 0-1
@@ -487,89 +452,66 @@ class MarketRegimeDetector:
         metrics = self.metrics[symbol]
         
         # Extrai valores
-        trend_strength = metrics['trend_strength']
-        trend_direction = metrics['trend_direction']
-        volatility = metrics['volatility']
-        liquidity = metrics['liquidity']
-        momentum = metrics['momentum']
-        micro_score = metrics['microstructure_score']
-        
-        # Sistema de pontuação para cada regime
-        scores = {
-            MarketRegime.TRENDING_UP: 0,
-            MarketRegime.TRENDING_DOWN: 0,
-            MarketRegime.RANGING: 0,
-            MarketRegime.VOLATILE: 0,
-            MarketRegime.QUIET: 0,
-            MarketRegime.BREAKOUT: 0,
-            MarketRegime.REVERSAL: 0
-        }
-        
-        # TRENDING UP
-        if trend_direction > 0:
-            scores[MarketRegime.TRENDING_UP] = trend_strength * 0.4 + max(momentum, 0) * 0.3
-            if volatility == VolatilityLevel.NORMAL:
-                scores[MarketRegime.TRENDING_UP] += 0.2
-            if liquidity in [LiquidityLevel.NORMAL, LiquidityLevel.DEEP]:
-                scores[MarketRegime.TRENDING_UP] += 0.1
-        
-        # TRENDING DOWN
-        if trend_direction < 0:
-            scores[MarketRegime.TRENDING_DOWN] = trend_strength * 0.4 + abs(min(momentum, 0)) * 0.3
-            if volatility == VolatilityLevel.NORMAL:
-                scores[MarketRegime.TRENDING_DOWN] += 0.2
-            if liquidity in [LiquidityLevel.NORMAL, LiquidityLevel.DEEP]:
-                scores[MarketRegime.TRENDING_DOWN] += 0.1
+        trend_strength = metrics.trend_strength
+        trend_direction = metrics.trend_direction
+        volatility = metrics.volatility
+        liquidity = metrics.liquidity
+        momentum = metrics.momentum
+        micro_score = metrics.microstructure_score
+        
+        # Sistema de pontuação: cada condição entra como 0/1 multiplicando o peso
+        is_normal_vol = volatility is VolatilityLevel.NORMAL
+        is_low_vol = volatility is VolatilityLevel.LOW
+        is_high_vol = volatility is VolatilityLevel.HIGH or volatility is VolatilityLevel.EXTREME
+        is_thin = liquidity is LiquidityLevel.THIN
+        abs_momentum = abs(momentum)
+        
+        scores = [0.0] * len(_REGIMES)
+        
+        # TRENDING UP / DOWN
+        scores[_TRENDING_UP] = (trend_direction > 0) * (
+            trend_strength * 0.4 + max(momentum, 0) * 0.3 + is_normal_vol * 0.2 + (not is_thin) * 0.1
+        )
+        scores[_TRENDING_DOWN] = (trend_direction < 0) * (
+            trend_strength * 0.4 + abs(min(momentum, 0)) * 0.3 + is_normal_vol * 0.2 + (not is_thin) * 0.1
+        )
         
         # RANGING
-        if abs(trend_direction) == 0 or trend_strength < 0.3:
-            scores[MarketRegime.RANGING] = (1 - trend_strength) * 0.5
-            if volatility == VolatilityLevel.LOW:
-                scores[MarketRegime.RANGING] += 0.3
-            if abs(momentum) < 0.3:
-                scores[MarketRegime.RANGING] += 0.2
+        scores[_RANGING] = (trend_direction == 0 or trend_strength < 0.3) * (
+            (1 - trend_strength) * 0.5 + is_low_vol * 0.3 + (abs_momentum < 0.3) * 0.2
+        )
         
         # VOLATILE
-        if volatility in [VolatilityLevel.HIGH, VolatilityLevel.EXTREME]:
-            scores[MarketRegime.VOLATILE] = 0.5
-            if micro_score > 0.7:
-                scores[MarketRegime.VOLATILE] += 0.3
-            if liquidity == LiquidityLevel.THIN:
-                scores[MarketRegime.VOLATILE] += 0.2
+        scores[_VOLATILE] = is_high_vol * (0.5 + (micro_score > 0.7) * 0.3 + is_thin * 0.2)
         
         # QUIET
-        if volatility == VolatilityLevel.LOW and liquidity == LiquidityLevel.THIN:
-            scores[MarketRegime.QUIET] = 0.6
-            if abs(momentum) < 0.2:
-                scores[MarketRegime.QUIET] += 0.2
-            if micro_score < 0.3:
-                scores[MarketRegime.QUIET] += 0.2
+        scores[_QUIET] = (is_low_vol and is_thin) * (
+            0.6 + (abs_momentum < 0.2) * 0.2 + (micro_score < 0.3) * 0.2
+        )
         
         # BREAKOUT
-        if abs(momentum) > 0.7 and trend_strength > 0.5:
-            scores[MarketRegime.BREAKOUT] = abs(momentum) * 0.5 + trend_strength * 0.3
-            if volatility in [VolatilityLevel.HIGH, VolatilityLevel.EXTREME]:
-                scores[MarketRegime.BREAKOUT] += 0.2
+        scores[_BREAKOUT] = (abs_momentum > 0.7 and trend_strength > 0.5) * (
+            abs_momentum * 0.5 + trend_strength * 0.3 + is_high_vol * 0.2
+        )
         
         # REVERSAL
         # Detecta mudança de direção
-        recent_prices = [p['price'] for p in list(self.price_history[symbol])[-20:]]
+        recent_prices = self.price_history[symbol]['prices'].last(20)
         if len(recent_prices) >= 20:
             first_half_trend = 1 if recent_prices[10] > recent_prices[0] else -1
             second_half_trend = 1 if recent_prices[-1] > recent_prices[10] else -1
             
-            if first_half_trend != second_half_trend and abs(momentum) > 0.5:
-                scores[MarketRegime.REVERSAL] = 0.5 + abs(momentum) * 0.3
-                if micro_score > 0.6:
-                    scores[MarketRegime.REVERSAL] += 0.2
+            scores[_REVERSAL] = (first_half_trend != second_half_trend and abs_momentum > 0.5) * (
+                0.5 + abs_momentum * 0.3 + (micro_score > 0.6) * 0.2
+            )
         
-        # Determina regime com maior score
-        best_regime = max(scores.items(), key=lambda x: x[1])
-        regime = best_regime[0]
-        confidence = min(best_regime[1], 1.0)
+        # Determina regime com maior score (empate: primeiro na ordem da enum)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        regime = _REGIMES[best]
+        confidence = min(scores[best], 1.0)
         
         # Ajusta confiança baseado na consistência
-        if regime == self.current_regime.get(symbol):
+        if regime is self.current_regime.get(symbol):
             confidence = min(confidence * 1.1, 1.0)  # Bonus por consistência
         else:
             confidence *= 0.9  # Penalidade por mudança
@@ -588,19 +530,19 @@ class MarketRegimeDetector:
     def _get_regime_recommendations(self, symbol: str) -> List[str]:
         """Retorna recomendações baseadas no regime atual."""
         regime = self.current_regime.get(symbol, MarketRegime.RANGING)
-        metrics = self.metrics.get(symbol, {})
+        metrics = self.metrics.get(symbol) or self._create_empty_metrics()
         recommendations = []
         
         if regime == MarketRegime.TRENDING_UP:
             recommendations.append("Favorecer sinais de compra em pullbacks")
             recommendations.append("Usar stops mais largos para não sair prematuramente")
-            if metrics.get('volatility') == VolatilityLevel.LOW:
+            if metrics.volatility is VolatilityLevel.LOW:
                 recommendations.append("Considerar aumentar tamanho de posição")
         
         elif regime == MarketRegime.TRENDING_DOWN:
             recommendations.append("Favorecer sinais de venda em rallies")
             recommendations.append("Ser mais agressivo com stops de proteção")
-            if metrics.get('liquidity') == LiquidityLevel.THIN:
+            if metrics.liquidity is LiquidityLevel.THIN:
                 recommendations.append("Cuidado com slippage em saídas")
         
         elif regime == MarketRegime.RANGING:
@@ -633,7 +575,7 @@ class MarketRegimeDetector:
     def get_adaptive_parameters(self, symbol: str) -> Dict[str, float]:
         """Retorna parâmetros adaptados ao regime atual."""
         regime = self.current_regime.get(symbol, MarketRegime.RANGING)
-        metrics = self.metrics.get(symbol, {})
+        metrics = self.metrics.get(symbol) or self._create_empty_metrics()
         
         params = {
             'signal_threshold_multiplier': 1.0,
@@ -670,12 +612,12 @@ class MarketRegimeDetector:
             params['confirmation_requirement'] = 'LOW'
         
         # Ajusta por volatilidade
-        if metrics.get('volatility') == VolatilityLevel.EXTREME:
+        if metrics.volatility is VolatilityLevel.EXTREME:
             params['position_size_multiplier'] *= 0.5
             params['stop_loss_multiplier'] *= 1.5
         
         # Ajusta por liquidez
-        if metrics.get('liquidity') == LiquidityLevel.THIN:
+        if metrics.liquidity is LiquidityLevel.THIN:
             params['position_size_multiplier'] *= 0.7
             params['signal_threshold_multiplier'] *= 1.2
         
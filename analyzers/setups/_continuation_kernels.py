@@ -0,0 +1,90 @@
+"""
+Kernels compilados do detector de continuação: regressão da tendência e
+absorção no nível do pullback (fallback NumPy sem numba).
+"""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _level_flow_loop(prices, volumes, sides, level_tick):
+    """
+    Soma, em uma passada, o volume dos trades no nível de meio-tick
+    `level_tick` (round(preço * 2)) e o desequilíbrio (compra soma;
+    venda e UNKNOWN subtraem).
+
+    Returns:
+        (level_volume, level_imbalance)
+    """
+    volume = 0
+    imbalance = 0
+    for i in range(prices.shape[0]):
+        if np.int64(np.rint(prices[i] * 2.0)) == level_tick:
+            v = volumes[i]
+            volume += v
+            if sides[i] == 1:  # SIDE_BUY
+                imbalance += v
+            else:
+                imbalance -= v
+    return volume, imbalance
+
+
+def _level_flow_numpy(prices, volumes, sides, level_tick):
+    """Mesma agregação com máscara: desequilíbrio = 2 * compra - volume no nível."""
+    at_level = np.rint(prices * 2.0) == level_tick
+    level_volumes = volumes[at_level]
+    volume = int(level_volumes.sum())
+    buy = int(level_volumes[sides[at_level] == 1].sum())
+    return volume, 2 * buy - volume
+
+
+_level_flow = select_kernel(
+    _level_flow_loop, _level_flow_numpy,
+    (np.zeros(16), np.zeros(16, dtype=np.int64), np.zeros(16, dtype=np.int8), 0)
+)
+
+
+@njit(cache=True, error_model='numpy')
+def _trend_fit_loop(x, y):
+    """
+    Regressão linear de uma janela (mínimos quadrados em forma fechada) em
+    laços escalares - para 20 pontos evita as ~10 chamadas NumPy da versão
+    vetorizada (_fit_trend_rows).
+
+    Returns:
+        (slope, r_squared, y_mean) - r² limitado a [0, 1]
+    """
+    n = x.shape[0]
+    x_mean = 0.0
+    y_mean = 0.0
+    for i in range(n):
+        x_mean += x[i]
+        y_mean += y[i]
+    x_mean /= n
+    y_mean /= n
+
+    sxy = 0.0
+    sxx = 0.0
+    ss_tot = 0.0
+    for i in range(n):
+        dx = x[i] - x_mean
+        dy = y[i] - y_mean
+        sxy += dx * dy
+        sxx += dx * dx
+        ss_tot += dy * dy
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+
+    ss_res = 0.0
+    for i in range(n):
+        r = y[i] - (slope * x[i] + intercept)
+        ss_res += r * r
+
+    r_squared = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
+    return slope, min(max(r_squared, 0.0), 1.0), y_mean
+
+
+# Sem fallback: sem Numba o detector usa a versão vetorizada (_fit_trend_rows)
+_trend_fit_loop = select_kernel(_trend_fit_loop, None, (np.arange(20.0), np.arange(20.0)))
@@ -0,0 +1,146 @@
+"""
+Kernels compilados do detector de divergências.
+Cada teste devolve (código, força, variação de preço, variação do indicador);
+código 1 = BULLISH, -1 = BEARISH e 0 = sem divergência. Sem numba rodam
+como Python comum sobre as mesmas janelas NumPy.
+"""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _price_cvd_kernel(prices, cvds, windows, threshold):
+    """
+    Preço vs CVD: preço e CVD em sentidos opostos, testado em cada janela de
+    `windows` (crescentes, em amostras). Vale a janela de maior força; em
+    empate, a mais longa.
+    """
+    best_code = 0
+    best_strength = 0.0
+    best_price_change = 0.0
+    best_cvd_change = 0.0
+    for w in windows:
+        base = prices[-w]
+        price_change = (prices[-1] - base) / (base if base != 0 else 1.0) * 100
+        cvd_change = cvds[-1] - cvds[-w]  # CVD é absoluto, não percentual
+
+        # Bullish: preço cai mas CVD sobe; Bearish: preço sobe mas CVD cai
+        if price_change < -threshold and cvd_change > 50:
+            code = 1
+        elif price_change > threshold and cvd_change < -50:
+            code = -1
+        else:
+            continue
+        strength = min(abs(cvd_change) / 200, 1.0)
+        if strength >= best_strength:
+            best_code = code
+            best_strength = strength
+            best_price_change = price_change
+            best_cvd_change = cvd_change
+    return best_code, best_strength, best_price_change, best_cvd_change
+
+
+@njit(cache=True)
+def _price_volume_kernel(prices, volume_sum10, volume_sum20, threshold):
+    """
+    Preço vs volume: preço move (janela de 20 amostras) sem o volume acompanhar.
+    O volume chega como somas das últimas 10 e 20 amostras.
+    """
+    base = prices[-20]
+    price_change = (prices[-1] - base) / (base if base != 0 else 1.0) * 100
+    avg_volume_recent = volume_sum10 / 10
+    avg_volume_prior = (volume_sum20 - volume_sum10) / 10
+    volume_change = (avg_volume_recent - avg_volume_prior) / (avg_volume_prior if avg_volume_prior != 0 else 1.0) * 100
+
+    if abs(price_change) > threshold and abs(volume_change) < 20:
+        code = -1 if price_change > 0 else 1
+        strength = min(abs(price_change) / (abs(volume_change) + 1), 1.0) * 0.8
+        return code, strength, price_change, volume_change
+    return 0, 0.0, 0.0, 0.0
+
+
+@njit(cache=True)
+def _cvd_momentum_kernel(cvds, momentums):
+    """CVD vs momentum nas janelas de 10 amostras: tendências em direções opostas."""
+    cvd_trend = cvds[-1] - cvds[-10]
+    momentum_trend = momentums[-1] - momentums[-10]
+
+    if abs(cvd_trend) > 50 and abs(momentum_trend) > 30 and (cvd_trend > 0) != (momentum_trend > 0):
+        code = 1 if cvd_trend > 0 else -1
+        strength = min((abs(cvd_trend) + abs(momentum_trend)) / 200, 1.0) * 0.9
+        return code, strength, 0.0, cvd_trend  # Variação de preço não se aplica
+    return 0, 0.0, 0.0, 0.0
+
+
+@njit(cache=True)
+def _all_divergences_kernel(prices, cvds, volume_sum10, volume_sum20, momentums,
+                            windows, threshold, price_ready, momentum_ready, out):
+    """
+    Roda os três testes em uma chamada e grava um por linha de `out` (3 x 4):
+    preço vs CVD, preço vs volume e CVD vs momentum; colunas = código, força,
+    variação de preço e do indicador. Testes sem histórico ficam com linha zerada.
+
+    Args:
+        prices, cvds: últimas max(20, maior janela) amostras (ou menos, se
+            price_ready for False)
+        momentums: últimas 10 amostras
+        windows: janelas do teste preço vs CVD
+        price_ready: há histórico para os testes de preço
+        momentum_ready: há 10 amostras de CVD e momentum
+
+    Returns:
+        Número de linhas com divergência
+    """
+    out[:] = 0.0
+    if price_ready:
+        out[0, 0], out[0, 1], out[0, 2], out[0, 3] = _price_cvd_kernel(prices, cvds, windows, threshold)
+        out[1, 0], out[1, 1], out[1, 2], out[1, 3] = _price_volume_kernel(
+            prices, volume_sum10, volume_sum20, threshold
+        )
+    if momentum_ready:
+        out[2, 0], out[2, 1], out[2, 2], out[2, 3] = _cvd_momentum_kernel(cvds, momentums)
+
+    found = 0
+    for row in range(3):
+        if out[row, 0] != 0:
+            found += 1
+    return found
+
+
+@njit(cache=True)
+def _all_divergences_batch_kernel(series, volume_sums, windows, threshold, ready, out):
+    """
+    _all_divergences_kernel para vários símbolos sobre um bloco contíguo.
+
+    Args:
+        series: (n, 3, janela) preço, CVD e momentum por símbolo, alinhados ao
+            fim da janela (amostras faltantes à esquerda)
+        volume_sums: (n, 2) somas de volume das últimas 10 e 20 amostras
+        ready: (n, 2) price_ready / momentum_ready
+        out: (n, 3, 4)
+
+    Returns:
+        Número de linhas com divergência por símbolo
+    """
+    found = np.zeros(series.shape[0], dtype=np.int64)
+    for i in range(series.shape[0]):
+        found[i] = _all_divergences_kernel(
+            series[i, 0], series[i, 1], volume_sums[i, 0], volume_sums[i, 1], series[i, 2],
+            windows, threshold, ready[i, 0], ready[i, 1], out[i]
+        )
+    return found
+
+
+# Sem fallback: sem Numba os próprios laços rodam interpretados
+_price_volume_kernel = select_kernel(_price_volume_kernel, None, (np.ones(20), 0, 0, 0.3))
+_cvd_momentum_kernel = select_kernel(_cvd_momentum_kernel, None, (np.zeros(10), np.zeros(10)))
+_all_divergences_kernel = select_kernel(_all_divergences_kernel, None, (
+    np.ones(20), np.zeros(20), 0, 0, np.zeros(10), np.array([5, 10, 20], dtype=np.int64),
+    0.3, True, True, np.zeros((3, 4))
+))
+_all_divergences_batch_kernel = select_kernel(_all_divergences_batch_kernel, None, (
+    np.ones((2, 3, 20)), np.zeros((2, 2), dtype=np.int64), np.array([5, 10, 20], dtype=np.int64),
+    0.3, np.ones((2, 2), dtype=np.bool_), np.zeros((2, 3, 4))
+))
@@ -4,20 +4,102 @@ Detector de setups de continuação (breakout e pullback).
 Identifica pontos de entrada em continuações de tendência.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from itertools import count
 import numpy as np
 import logging
 
 # CORREÇÃO: Imports da classe base e entidades do domínio
 from application.services.base_setup_detector import SetupDetector
-from domain.entities.trade import Trade
+from domain.entities.trade import Trade, SIDE_BUY, SIDE_SELL
 from domain.entities.book import OrderBook
 from domain.entities.strategic_signal import SetupType, StrategicSignal
+from analyzers.statistics.trade_window import TradeArrays, tail_arrays, trade_timestamps
+from analyzers._njit import NUMBA_AVAILABLE
+from analyzers.setups._continuation_kernels import _level_flow, _trend_fit_loop
 
 logger = logging.getLogger(__name__)
 
+# Maior janela de trades lida pelos cálculos (tendência e absorção)
+_MAX_WINDOW = 50
+
+class _SideVolumes:
+    """
+    Volumes acumulados de compra e venda da janela (com zero inicial).
+    Calculados uma vez por detect; a soma de qualquer cauda sai por diferença em O(1).
+    """
+
+    __slots__ = ('buy', 'sell')
+
+    def __init__(self, columns: TradeArrays):
+        n = len(columns.volumes)
+        self.buy = np.zeros(n + 1, dtype=np.int64)
+        self.sell = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(columns.volumes * (columns.sides == SIDE_BUY), out=self.buy[1:])
+        np.cumsum(columns.volumes * (columns.sides == SIDE_SELL), out=self.sell[1:])
+
+    def tail(self, count: int):
+        """(volume comprador, volume vendedor) dos últimos `count` trades."""
+        start = len(self.buy) - 1 - count
+        return int(self.buy[-1] - self.buy[start]), int(self.sell[-1] - self.sell[start])
+
+    def __len__(self) -> int:
+        return len(self.buy) - 1
+
+
+def _fit_trend_rows(x: np.ndarray, y: np.ndarray,
+                    scratch: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None):
+    """
+    Regressão linear de cada linha (mínimos quadrados em forma fechada).
+    
+    Args:
+        x, y: (n_janelas, tamanho)
+        scratch: buffers float64 (dx, dy, resíduos) com o formato de x,
+            reutilizados entre chamadas; alocados se None
+    
+    Returns:
+        (slope, r_squared, y_mean) por linha - r² limitado a [0, 1]
+    """
+    if scratch is None:
+        scratch = (np.empty(x.shape), np.empty(x.shape), np.empty(x.shape))
+    dx, dy, residuals = scratch
+    
+    x_mean = x.mean(axis=1)
+    y_mean = y.mean(axis=1)
+    np.subtract(x, x_mean[:, np.newaxis], out=dx)
+    np.subtract(y, y_mean[:, np.newaxis], out=dy)
+    slope = np.einsum('ij,ij->i', dx, dy) / np.einsum('ij,ij->i', dx, dx)
+    intercept = y_mean - slope * x_mean
+    
+    # R-squared para força da tendência: y - (slope * x + intercept)
+    np.multiply(x, slope[:, np.newaxis], out=residuals)
+    np.add(residuals, intercept[:, np.newaxis], out=residuals)
+    np.subtract(y, residuals, out=residuals)
+    ss_res = np.einsum('ij,ij->i', residuals, residuals)
+    ss_tot = np.einsum('ij,ij->i', dy, dy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 0.0)
+    return slope, np.clip(r_squared, 0.0, 1.0), y_mean
+
+
+def _signal_levels(sign: int, entry_price: float, stop_ref: float, target_ref: float,
+                   stop_offset: float, target_offsets: Tuple[float, float]):
+    """
+    Stop, alvos e risco/retorno de um sinal (sign: 1 compra, -1 venda).
+    O stop fica `stop_offset` contra a posição a partir de `stop_ref`;
+    os alvos, a favor da posição a partir de `target_ref`.
+    
+    Returns:
+        (stop_loss, [alvo1, alvo2], risk_reward)
+    """
+    stop_loss = stop_ref - sign * stop_offset
+    targets = [target_ref + sign * offset for offset in target_offsets]
+    risk = abs(entry_price - stop_loss)
+    reward = abs(targets[0] - entry_price)
+    return stop_loss, targets, (reward / risk if risk > 0 else 0)
+
 
 @dataclass
 class TrendInfo:
@@ -46,6 +128,9 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
     Rejeição de Pullback: Detecta pullback após tendência com 3 tipos de confirmação
     """
     
+    # Sequência dos ids de sinal (compartilhada entre instâncias, única no processo)
+    _signal_ids = count(1)
+    
     def __init__(self, config: Dict = None):
         super().__init__(config) # CORREÇÃO: Chama o __init__ da classe pai
         
@@ -61,12 +146,22 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         self.pullback_confirmation_types = self.config.get('pullback_confirmation_types', 
                                                            ['absorption', 'divergence', 'pressure'])
         
+        # Configuração resolvida uma vez (fixa após o __init__)
+        self._confirm_absorption = 'absorption' in self.pullback_confirmation_types
+        self._confirm_divergence = 'divergence' in self.pullback_confirmation_types
+        self._confirm_pressure = 'pressure' in self.pullback_confirmation_types
+        self._breakout_cvd_sell_threshold = -self.breakout_cvd_threshold
+        
         # Estado interno
         self.trend_info = {'WDO': None, 'DOL': None}
-        self.resistance_levels = {'WDO': [], 'DOL': []}
-        self.support_levels = {'WDO': [], 'DOL': []}
+        # Níveis em np.ndarray crescente (busca binária em _find_breakout_level)
+        self.resistance_levels = {'WDO': np.empty(0), 'DOL': np.empty(0)}
+        self.support_levels = {'WDO': np.empty(0), 'DOL': np.empty(0)}
         self.pullback_candidates = {'WDO': [], 'DOL': []}
         
+        # Buffers da regressão de uma janela (1 x 20), reutilizados a cada detect
+        self._trend_scratch = tuple(np.empty((1, 20)) for _ in range(3))
+        
         logger.info("ContinuationSetupDetector inicializado")
         
     # CORREÇÃO: Adição do método obrigatório
@@ -87,21 +182,94 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         Returns:
             Lista de sinais estratégicos detectados
         """
-        signals = []
-        
         if not trades or len(trades) < 20 or not book:
-            return signals
+            return []
+        
+        columns, timestamps, side_volumes = self._extract_columns(trades)
         
         # Atualiza análise de tendência
-        self._update_trend_analysis(symbol, trades)
+        self._update_trend_analysis(symbol, trades, columns, timestamps)
+        
+        # Relógio lido uma vez: criação e expiração dos sinais desta chamada
+        return self._detect_setups(
+            symbol, trades, columns, timestamps, side_volumes, book, market_context, datetime.now()
+        )
+    
+    def detect_batch(self,
+                     updates: Dict[str, Tuple[List[Trade], Optional[OrderBook], Dict]]
+                     ) -> Dict[str, List[StrategicSignal]]:
+        """
+        Aplica `detect` a vários símbolos do mesmo ciclo (ex.: WDO e DOL) de uma vez:
+        as regressões de tendência de todos rodam como uma única operação por linhas.
+        
+        Args:
+            updates: {símbolo: (trades, book, market_context do símbolo)}
+        
+        Returns:
+            {símbolo: sinais detectados}
+        """
+        results = {symbol: [] for symbol in updates}
+        
+        ready = {}
+        for symbol, (trades, book, market_context) in updates.items():
+            if trades and len(trades) >= 20 and book:
+                ready[symbol] = (trades, book, market_context) + self._extract_columns(trades)
+        
+        # Janelas de regressão dos símbolos que precisam de novo ajuste
+        windows = {}
+        for symbol, (trades, _, _, columns, timestamps, _) in ready.items():
+            window = self._trend_window(symbol, trades, columns, timestamps)
+            if window is not None:
+                windows[symbol] = window
+        
+        if windows:
+            x = np.stack([window[0] for window in windows.values()])
+            y = np.stack([window[1] for window in windows.values()])
+            slopes, r_squared, y_means = _fit_trend_rows(x, y)
+            for i, symbol in enumerate(windows):
+                _, _, _, columns, timestamps, _ = ready[symbol]
+                self._apply_trend_fit(symbol, columns.prices, timestamps, slopes[i], r_squared[i], y_means[i])
+        
+        now = datetime.now()
+        for symbol, (trades, book, market_context, columns, timestamps, side_volumes) in ready.items():
+            results[symbol] = self._detect_setups(
+                symbol, trades, columns, timestamps, side_volumes, book, market_context, now
+            )
+        
+        return results
+    
+    def _extract_columns(self, trades: List[Trade]) -> Tuple[TradeArrays, np.ndarray, _SideVolumes]:
+        """Colunas dos últimos trades, extraídas uma vez e compartilhadas pelos cálculos."""
+        columns = tail_arrays(trades, _MAX_WINDOW)
+        return columns, trade_timestamps(trades[-_MAX_WINDOW:]), _SideVolumes(columns)
+    
+    def _detect_setups(self,
+                       symbol: str,
+                       trades: List[Trade],
+                       columns: TradeArrays,
+                       timestamps: np.ndarray,
+                       side_volumes: _SideVolumes,
+                       book: OrderBook,
+                       market_context: Dict,
+                       now: datetime) -> List[StrategicSignal]:
+        """Busca breakout e pullback com a tendência já atualizada."""
+        signals = []
+        
+        # Leituras do contexto feitas uma vez por chamada
+        cvd = (market_context.get('cvd') or {}).get(symbol, 0)
+        cvd_roc = (market_context.get('cvd_roc') or {}).get(symbol, 0)
         
         # 1. Detecta Ignição de Breakout
-        breakout_signal = self._detect_breakout_ignition(symbol, trades, book, market_context)
+        breakout_signal = self._detect_breakout_ignition(
+            symbol, trades, timestamps, side_volumes, book, cvd, now
+        )
         if breakout_signal:
             signals.append(breakout_signal)
         
         # 2. Detecta Rejeição de Pullback
-        pullback_signal = self._detect_pullback_rejection(symbol, trades, book, market_context)
+        pullback_signal = self._detect_pullback_rejection(
+            symbol, columns, timestamps, side_volumes, book, cvd_roc, now
+        )
         if pullback_signal:
             signals.append(pullback_signal)
         
@@ -110,17 +278,20 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
     def _detect_breakout_ignition(self,
                                   symbol: str,
                                   trades: List[Trade],
+                                  timestamps: np.ndarray,
+                                  side_volumes: _SideVolumes,
                                   book: Optional[OrderBook],
-                                  market_context: Dict) -> Optional[StrategicSignal]:
+                                  cvd: float,
+                                  now: datetime) -> Optional[StrategicSignal]:
         """Detecta ignição de breakout (momentum + pressão)."""
         
         # 1. Verifica momentum
-        momentum = self._calculate_momentum(trades)
+        momentum = self._calculate_momentum(side_volumes, timestamps)
         if abs(momentum) < self.breakout_momentum_threshold:
             return None
         
         # 2. Verifica pressão
-        pressure = self._calculate_pressure(trades)
+        pressure = self._calculate_pressure(side_volumes)
         buy_pressure = pressure.get('buy_ratio', 0)
         sell_pressure = pressure.get('sell_ratio', 0)
         
@@ -134,10 +305,9 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         
         # 3. Confirmação opcional com CVD
         if self.breakout_cvd_confirmation:
-            cvd = market_context.get('cvd', {}).get(symbol, 0)
             if direction == "COMPRA" and cvd < self.breakout_cvd_threshold:
                 return None
-            elif direction == "VENDA" and cvd > -self.breakout_cvd_threshold:
+            elif direction == "VENDA" and cvd > self._breakout_cvd_sell_threshold:
                 return None
         
         # 4. Identifica nível de breakout
@@ -146,14 +316,17 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
             return None
         
         return self._create_breakout_signal(
-            symbol, direction, momentum, pressure, breakout_level, book, market_context
+            symbol, direction, momentum, pressure, breakout_level, book, cvd, now
         )
     
     def _detect_pullback_rejection(self,
                                    symbol: str,
-                                   trades: List[Trade],
+                                   columns: TradeArrays,
+                                   timestamps: np.ndarray,
+                                   side_volumes: _SideVolumes,
                                    book: Optional[OrderBook],
-                                   market_context: Dict) -> Optional[StrategicSignal]:
+                                   cvd_roc: float,
+                                   now: datetime) -> Optional[StrategicSignal]:
         """Detecta rejeição de pullback com confirmação."""
         
         trend = self.trend_info.get(symbol)
@@ -161,7 +334,7 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
             return None
         
         # 1. Identifica pullback
-        pullback = self._identify_pullback(symbol, trades, trend)
+        pullback = self._identify_pullback(columns, timestamps, trend)
         if not pullback:
             return None
         
@@ -172,7 +345,7 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         
         # 3. Busca confirmações
         confirmations = self._check_pullback_confirmations(
-            symbol, trades, pullback, trend, market_context
+            columns, side_volumes, pullback, trend, cvd_roc
         )
         
         if len(confirmations) < 2:  # Precisa pelo menos 2 confirmações
@@ -182,22 +355,55 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         entry_type = self._determine_pullback_entry(confirmations)
         
         return self._create_pullback_signal(
-            symbol, trend.direction, pullback, confirmations, entry_type, book, market_context
+            symbol, trend.direction, pullback, confirmations, entry_type, book, now
         )
 
-    def _update_trend_analysis(self, symbol: str, trades: List[Trade]):
-        """Atualiza análise de tendência com tratamento de erros."""
-        if len(trades) < self.pullback_min_trend_bars:
+    def _update_trend_analysis(self, symbol: str, trades: List[Trade], columns: TradeArrays,
+                               timestamps: np.ndarray):
+        """Atualiza análise de tendência."""
+        window = self._trend_window(symbol, trades, columns, timestamps)
+        if window is None:
             return
         
-        prices = [t.price for t in trades[-50:]]
+        x, y = window
+        if NUMBA_AVAILABLE:
+            slope, r_squared, y_mean = _trend_fit_loop(x, y)
+        else:
+            slopes, r_squareds, y_means = _fit_trend_rows(x[np.newaxis], y[np.newaxis], self._trend_scratch)
+            slope, r_squared, y_mean = slopes[0], r_squareds[0], y_means[0]
+        self._apply_trend_fit(symbol, columns.prices, timestamps, slope, r_squared, y_mean)
+    
+    def _trend_window(self, symbol: str, trades: List[Trade], columns: TradeArrays,
+                      timestamps: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Aplica os filtros da análise de tendência e monta a janela da regressão.
+        
+        Returns:
+            (x, y) dos últimos 20 trades, ou None quando não há regressão a fazer
+            (a tendência já foi resolvida sem regressão)
+        """
+        if len(trades) < self.pullback_min_trend_bars:
+            return None
+        
+        prices = columns.prices
         
         # Verifica se há dados suficientes e variados
         if len(prices) < 20:
-            return
+            return None
+        
+        # A regressão usa os timestamps relativos ao 50º trade: sem ele a tendência é lateral
+        if len(prices) < 50:
+            self.trend_info[symbol] = TrendInfo(
+                direction="LATERAL",
+                strength=0.0,
+                duration=0,
+                slope=0.0
+            )
+            return None
         
         # Verifica se há variação nos preços
-        price_variance = np.var(prices[-20:])
+        y = prices[-20:]
+        price_variance = np.var(y)
         if price_variance < 1e-10:  # Praticamente sem variação
             logger.debug(f"Sem variação de preço suficiente em {symbol} para análise de tendência")
             self.trend_info[symbol] = TrendInfo(
@@ -206,80 +412,60 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
                 duration=0,
                 slope=0.0
             )
-            return
+            return None
         
-        try:
-            # Cria timestamps relativos em segundos
-            base_time = trades[-50].timestamp
-            timestamps = [(t.timestamp - base_time).total_seconds() for t in trades[-50:]]
-            
-            # Verifica se há variação temporal
-            if len(set(timestamps[-20:])) < 5:  # Menos de 5 timestamps únicos
-                logger.debug(f"Timestamps muito próximos em {symbol}, usando índices")
-                # Usa índices simples se timestamps são muito próximos
-                timestamps = list(range(len(trades[-50:])))
-            
-            # Regressão linear para determinar tendência
-            try:
-                slope, intercept = np.polyfit(timestamps[-20:], prices[-20:], 1)
-            except np.linalg.LinAlgError:
-                # Fallback: usa média móvel simples
-                logger.debug(f"Polyfit falhou para {symbol}, usando média móvel")
-                ma_short = np.mean(prices[-10:])
-                ma_long = np.mean(prices[-20:])
-                slope = (ma_short - ma_long) / 10  # Aproximação simples
-                intercept = ma_long
-            
-            # R-squared para força da tendência
-            try:
-                y_pred = [slope * t + intercept for t in timestamps[-20:]]
-                ss_res = sum((prices[-20:][i] - y_pred[i]) ** 2 for i in range(20))
-                ss_tot = sum((p - np.mean(prices[-20:])) ** 2 for p in prices[-20:])
-                r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-                r_squared = max(0, min(1, r_squared))  # Clamp entre 0 e 1
-            except:
-                r_squared = 0.5  # Valor padrão se cálculo falhar
-            
-            # Determina direção
-            avg_price = np.mean(prices[-20:]) if prices[-20:] else 1
-            normalized_slope = slope / avg_price if avg_price != 0 else 0
-            
-            if abs(normalized_slope) < 0.001:  # Threshold para considerar lateral
-                direction = "LATERAL"
-            else:
-                direction = "ALTA" if normalized_slope > 0 else "BAIXA"
-            
-            # Calcula duração da tendência
-            duration = int((trades[-1].timestamp - trades[-50].timestamp).total_seconds())
-            
-            self.trend_info[symbol] = TrendInfo(
-                direction=direction,
-                strength=r_squared,
-                duration=duration,
-                slope=normalized_slope
-            )
-            
-            # Atualiza níveis de suporte/resistência
-            self._update_support_resistance(symbol, prices)
-            
-        except Exception as e:
-            logger.error(f"Erro ao analisar tendência para {symbol}: {e}")
-            # Define tendência padrão em caso de erro
+        # Cria timestamps relativos em segundos
+        elapsed = (timestamps - timestamps[-50]) / 1e6
+        
+        # Verifica se há variação temporal
+        if len(np.unique(elapsed[-20:])) < 5:  # Menos de 5 timestamps únicos
+            logger.debug(f"Timestamps muito próximos em {symbol}, usando índices")
+            # Usa índices simples se timestamps são muito próximos
+            elapsed = np.arange(len(prices), dtype=np.float64)
+        
+        return elapsed[-20:], y
+    
+    def _apply_trend_fit(self, symbol: str, prices: np.ndarray, timestamps: np.ndarray,
+                         slope: float, r_squared: float, y_mean: float):
+        """Registra a tendência a partir da regressão e atualiza suporte/resistência."""
+        if not np.isfinite(slope):
+            # Regressão degenerada (x sem variação): sem tendência definida
+            logger.debug(f"Regressão de tendência degenerada em {symbol}")
             self.trend_info[symbol] = TrendInfo(
                 direction="LATERAL",
                 strength=0.0,
                 duration=0,
                 slope=0.0
             )
+            return
+        
+        # Determina direção
+        normalized_slope = slope / y_mean if y_mean != 0 else 0
+        
+        if abs(normalized_slope) < 0.001:  # Threshold para considerar lateral
+            direction = "LATERAL"
+        else:
+            direction = "ALTA" if normalized_slope > 0 else "BAIXA"
+        
+        # Calcula duração da tendência
+        duration = int((timestamps[-1] - timestamps[-50]) / 1e6)
+        
+        self.trend_info[symbol] = TrendInfo(
+            direction=direction,
+            strength=float(r_squared),
+            duration=duration,
+            slope=float(normalized_slope)
+        )
+        
+        # Atualiza níveis de suporte/resistência
+        self._update_support_resistance(symbol, prices)
     
-    def _calculate_momentum(self, trades: List[Trade]) -> float:
+    def _calculate_momentum(self, side_volumes: _SideVolumes, timestamps: np.ndarray) -> float:
         """Calcula momentum baseado em volume e direção."""
-        if len(trades) < 10:
+        if len(side_volumes) < 10:
             return 0
         
-        recent_trades = trades[-10:]
-        buy_volume = sum(t.volume for t in recent_trades if t.side.name == "BUY")
-        sell_volume = sum(t.volume for t in recent_trades if t.side.name == "SELL")
+        buy_volume, sell_volume = side_volumes.tail(10)
         
         total_volume = buy_volume + sell_volume
         if total_volume == 0:
@@ -289,21 +475,20 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         momentum = ((buy_volume - sell_volume) / total_volume) * 100
         
         # Ajusta por velocidade (trades por segundo)
-        time_span = (trades[-1].timestamp - trades[-10].timestamp).total_seconds()
+        time_span = (timestamps[-1] - timestamps[-10]) / 1e6
         if time_span > 0:
-            trades_per_second = len(recent_trades) / time_span
+            trades_per_second = 10 / time_span
             momentum *= (1 + trades_per_second / 10)  # Boost por velocidade
         
         return momentum
     
-    def _calculate_pressure(self, trades: List[Trade]) -> Dict[str, float]:
-        """Calcula pressão compradora/vendedora."""
-        if len(trades) < 20:
+    def _calculate_pressure(self, side_volumes: _SideVolumes, count: int = 20) -> Dict[str, float]:
+        """Calcula pressão compradora/vendedora nos últimos `count` trades."""
+        count = min(count, len(side_volumes))
+        if count < 20:
             return {'buy_ratio': 0.5, 'sell_ratio': 0.5}
         
-        recent_trades = trades[-20:]
-        buy_volume = sum(t.volume for t in recent_trades if t.side.name == "BUY")
-        sell_volume = sum(t.volume for t in recent_trades if t.side.name == "SELL")
+        buy_volume, sell_volume = side_volumes.tail(count)
         
         total_volume = buy_volume + sell_volume
         if total_volume == 0:
@@ -321,31 +506,33 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         current_price = trades[-1].price
         
         if direction == "COMPRA":
-            # Procura resistência sendo rompida
-            resistances = [r for r in self.resistance_levels[symbol] if r < current_price]
-            if resistances:
-                return max(resistances)  # Resistência mais próxima
+            # Procura resistência sendo rompida: a maior abaixo do preço (mais próxima)
+            resistances = self.resistance_levels[symbol]
+            idx = resistances.searchsorted(current_price, side='left')
+            if idx > 0:
+                return float(resistances[idx - 1])
         else:
-            # Procura suporte sendo rompido
-            supports = [s for s in self.support_levels[symbol] if s > current_price]
-            if supports:
-                return min(supports)  # Suporte mais próximo
+            # Procura suporte sendo rompido: o menor acima do preço (mais próximo)
+            supports = self.support_levels[symbol]
+            idx = supports.searchsorted(current_price, side='right')
+            if idx < len(supports):
+                return float(supports[idx])
         
         return None
     
-    def _identify_pullback(self, symbol: str, trades: List[Trade], trend: TrendInfo) -> Optional[PullbackInfo]:
+    def _identify_pullback(self, columns: TradeArrays, timestamps: np.ndarray,
+                           trend: TrendInfo) -> Optional[PullbackInfo]:
         """Identifica um pullback na tendência."""
-        if len(trades) < 30:
+        if len(timestamps) < 30:
             return None
         
-        prices = [t.price for t in trades[-30:]]
-        
-        start_price = 0
-        current_price = trades[-1].price
+        prices = columns.prices[-30:]
+        current_price = float(prices[-1])
 
         if trend.direction == "ALTA":
             # Procura por retração em tendência de alta
-            start_price = max(prices[:-10])  # Pico antes dos últimos 10 trades
+            start_idx = int(np.argmax(prices[:-10]))  # Pico antes dos últimos 10 trades
+            start_price = float(prices[start_idx])
             if current_price >= start_price:  # Não há pullback
                 return None
             depth = start_price - current_price
@@ -353,7 +540,8 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
             
         elif trend.direction == "BAIXA":
             # Procura por retração em tendência de baixa
-            start_price = min(prices[:-10])  # Vale antes dos últimos 10 trades
+            start_idx = int(np.argmin(prices[:-10]))  # Vale antes dos últimos 10 trades
+            start_price = float(prices[start_idx])
             if current_price <= start_price:  # Não há pullback
                 return None
             depth = current_price - start_price
@@ -362,12 +550,11 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         else:
             return None
         
-        # Calcula duração e volume do pullback
-        pullback_start_idx = prices.index(start_price)
-        pullback_trades = trades[-(30-pullback_start_idx):]
+        # Calcula duração e volume do pullback (índice do extremo já conhecido)
+        pullback_len = 30 - start_idx
         
-        duration = (trades[-1].timestamp - pullback_trades[0].timestamp).total_seconds()
-        volume = sum(t.volume for t in pullback_trades)
+        duration = (timestamps[-1] - timestamps[-pullback_len]) / 1e6
+        volume = int(columns.volumes[-pullback_len:].sum())
         
         return PullbackInfo(
             start_price=start_price,
@@ -378,28 +565,28 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         )
     
     def _check_pullback_confirmations(self,
-                                      symbol: str,
-                                      trades: List[Trade],
+                                      columns: TradeArrays,
+                                      side_volumes: _SideVolumes,
                                       pullback: PullbackInfo,
                                       trend: TrendInfo,
-                                      market_context: Dict) -> List[str]:
+                                      cvd_roc: float) -> List[str]:
         """Verifica confirmações para rejeição do pullback."""
         confirmations = []
         
         # 1. Confirmação por Absorção
-        if 'absorption' in self.pullback_confirmation_types:
-            if self._check_absorption_at_pullback(trades, pullback, trend):
+        if self._confirm_absorption:
+            if self._check_absorption_at_pullback(columns, pullback, trend):
                 confirmations.append("ABSORÇÃO")
         
         # 2. Confirmação por Divergência
-        if 'divergence' in self.pullback_confirmation_types:
-            cvd_divergence = self._check_cvd_divergence(symbol, pullback, trend, market_context)
+        if self._confirm_divergence:
+            cvd_divergence = self._check_cvd_divergence(pullback, trend, cvd_roc)
             if cvd_divergence:
                 confirmations.append("DIVERGÊNCIA_CVD")
         
         # 3. Confirmação por Pressão
-        if 'pressure' in self.pullback_confirmation_types:
-            pressure = self._calculate_pressure(trades[-10:])
+        if self._confirm_pressure:
+            pressure = self._calculate_pressure(side_volumes, 10)
             if trend.direction == "ALTA" and pressure['buy_ratio'] > 0.65:
                 confirmations.append("PRESSÃO_COMPRADORA")
             elif trend.direction == "BAIXA" and pressure['sell_ratio'] > 0.65:
@@ -407,19 +594,14 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         
         return confirmations
     
-    def _check_absorption_at_pullback(self, trades: List[Trade], pullback: PullbackInfo, trend: TrendInfo) -> bool:
+    def _check_absorption_at_pullback(self, columns: TradeArrays, pullback: PullbackInfo, trend: TrendInfo) -> bool:
         """Verifica se há absorção no nível do pullback."""
-        pullback_level = round(pullback.current_price / 0.5) * 0.5
-        level_volume = 0
-        level_imbalance = 0
-        
-        for trade in trades[-50:]:
-            if abs(trade.price - pullback_level) < 0.5:
-                level_volume += trade.volume
-                if trade.side.name == "BUY":
-                    level_imbalance += trade.volume
-                else:
-                    level_imbalance -= trade.volume
+        # Nível do pullback em meio-ticks inteiros (preços andam de 0.5 em 0.5)
+        level_tick = round(pullback.current_price * 2)
+        
+        level_volume, level_imbalance = _level_flow(
+            columns.prices[-50:], columns.volumes[-50:], columns.sides[-50:], level_tick
+        )
         
         # Absorção em alta: vendedores sendo absorvidos
         if trend.direction == "ALTA" and level_volume > 200 and level_imbalance < -100:
@@ -430,10 +612,8 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         
         return False
     
-    def _check_cvd_divergence(self, symbol: str, pullback: PullbackInfo, trend: TrendInfo, market_context: Dict) -> bool:
+    def _check_cvd_divergence(self, pullback: PullbackInfo, trend: TrendInfo, cvd_roc: float) -> bool:
         """Verifica divergência no CVD durante pullback."""
-        cvd_roc = market_context.get('cvd_roc', {}).get(symbol, 0)
-        
         # Em alta: pullback com CVD crescente = divergência positiva
         if trend.direction == "ALTA" and cvd_roc > 50:
             return True
@@ -459,50 +639,43 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
                                  pressure: Dict,
                                  breakout_level: float,
                                  book: Optional[OrderBook],
-                                 market_context: Dict) -> StrategicSignal:
+                                 cvd: float,
+                                 now: datetime) -> StrategicSignal:
         """Cria sinal de ignição de breakout."""
-        current_price = book.best_ask if direction == "COMPRA" else book.best_bid
+        is_buy = direction == "COMPRA"
+        entry_price = book.best_ask if is_buy else book.best_bid
         
-        if direction == "COMPRA":
-            entry_price = current_price
-            stop_loss = breakout_level - 2.0
-            target1 = entry_price + 10.0
-            target2 = entry_price + 20.0
-        else:
-            entry_price = current_price
-            stop_loss = breakout_level + 2.0
-            target1 = entry_price - 10.0
-            target2 = entry_price - 20.0
-        
-        risk = abs(entry_price - stop_loss)
-        reward = abs(target1 - entry_price)
-        risk_reward = reward / risk if risk > 0 else 0
+        # Stop além do nível rompido; alvos a partir da entrada
+        stop_loss, targets, risk_reward = _signal_levels(
+            1 if is_buy else -1, entry_price, breakout_level, entry_price, 2.0, (10.0, 20.0)
+        )
         
         # Confiança baseada em momentum e pressão
-        pressure_ratio = pressure['buy_ratio'] if direction == "COMPRA" else pressure['sell_ratio']
+        pressure_ratio = pressure['buy_ratio'] if is_buy else pressure['sell_ratio']
         confidence = 0.6 + (min(abs(momentum), 150) / 500) + (pressure_ratio - 0.5) * 0.4
         confidence = min(max(confidence, 0.6), 0.95)
         
         confluence_factors = [
-            f"Rompimento de {'resistência' if direction == 'COMPRA' else 'suporte'} @ {breakout_level:.2f}",
+            f"Rompimento de {'resistência' if is_buy else 'suporte'} @ {breakout_level:.2f}",
             f"Momentum: {momentum:.0f}%",
             f"Pressão {direction.lower()}: {pressure_ratio*100:.0f}%"
         ]
         
-        if market_context.get('cvd', {}).get(symbol):
-            confluence_factors.append(f"CVD confirmado: {market_context['cvd'][symbol]:+d}")
+        if cvd:
+            confluence_factors.append(f"CVD confirmado: {cvd:+d}")
         
         return StrategicSignal(
-            id=f"BREAKOUT_{symbol}_{datetime.now().timestamp()}",
+            id=f"BREAKOUT_{symbol}_{next(self._signal_ids)}",
+            timestamp=now,
             symbol=symbol,
             setup_type=SetupType.BREAKOUT_IGNITION,
             direction=direction,
             entry_price=entry_price,
             stop_loss=stop_loss,
-            targets=[target1, target2],
+            targets=targets,
             confidence=confidence,
             risk_reward=risk_reward,
-            expiration_time=datetime.now() + timedelta(minutes=15),  # 15 minutos para breakout
+            expiration_time=now + timedelta(minutes=15),  # 15 minutos para breakout
             confluence_factors=confluence_factors,
             metadata={
                 'momentum': momentum,
@@ -519,31 +692,22 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
                                  confirmations: List[str],
                                  entry_type: str,
                                  book: Optional[OrderBook],
-                                 market_context: Dict) -> StrategicSignal:
+                                 now: datetime) -> StrategicSignal:
         """Cria sinal de rejeição de pullback."""
-        current_price = book.best_ask if direction == "COMPRA" else book.best_bid
+        sign = 1 if direction == "COMPRA" else -1
         
         # Define entrada baseada no tipo
         if entry_type == "LIMIT":
             entry_price = pullback.current_price
         elif entry_type == "MARKET":
-            entry_price = current_price
+            entry_price = book.best_ask if sign > 0 else book.best_bid
         else:  # STOP
-            entry_price = pullback.start_price + (1.0 if direction == "COMPRA" else -1.0)
+            entry_price = pullback.start_price + sign * 1.0
         
-        # Define stops e alvos
-        if direction == "COMPRA":
-            stop_loss = pullback.current_price - 3.0
-            target1 = pullback.start_price + 5.0
-            target2 = pullback.start_price + 12.0
-        else:
-            stop_loss = pullback.current_price + 3.0
-            target1 = pullback.start_price - 5.0
-            target2 = pullback.start_price - 12.0
-        
-        risk = abs(entry_price - stop_loss)
-        reward = abs(target1 - entry_price)
-        risk_reward = reward / risk if risk > 0 else 0
+        # Stop além do fundo/topo do pullback; alvos a partir do início do pullback
+        stop_loss, targets, risk_reward = _signal_levels(
+            sign, entry_price, pullback.current_price, pullback.start_price, 3.0, (5.0, 12.0)
+        )
         
         # Confiança baseada no número e tipo de confirmações
         base_confidence = 0.65
@@ -562,16 +726,17 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
         ]
         
         return StrategicSignal(
-            id=f"PULLBACK_{symbol}_{datetime.now().timestamp()}",
+            id=f"PULLBACK_{symbol}_{next(self._signal_ids)}",
+            timestamp=now,
             symbol=symbol,
             setup_type=SetupType.PULLBACK_REJECTION,
             direction=direction,
             entry_price=entry_price,
             stop_loss=stop_loss,
-            targets=[target1, target2],
+            targets=targets,
             confidence=confidence,
             risk_reward=risk_reward,
-            expiration_time=datetime.now() + timedelta(minutes=10),  # 10 minutos para pullback
+            expiration_time=now + timedelta(minutes=10),  # 10 minutos para pullback
             confluence_factors=confluence_factors,
             metadata={
                 'pullback_info': pullback,
@@ -581,49 +746,35 @@ class ContinuationSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDete
             }
         )
     
-    def _update_support_resistance(self, symbol: str, prices: List[float]):
+    def _update_support_resistance(self, symbol: str, prices: np.ndarray):
         """Atualiza níveis de suporte e resistência."""
         if len(prices) < 50:
             return
         
-        # Encontra máximos e mínimos locais
-        resistance_candidates = []
-        support_candidates = []
+        # Encontra máximos e mínimos locais: cada ponto i contra a janela de 20 trades [i-10, i+10)
+        windows = np.lib.stride_tricks.sliding_window_view(prices, 20)[:len(prices) - 20]
+        centers = prices[10:len(prices) - 10]
         
-        for i in range(10, len(prices) - 10):
-            # Resistência: ponto mais alto em janela de 20 trades
-            if prices[i] == max(prices[i-10:i+10]):
-                resistance_candidates.append(prices[i])
-            # Suporte: ponto mais baixo em janela de 20 trades
-            elif prices[i] == min(prices[i-10:i+10]):
-                support_candidates.append(prices[i])
+        # Resistência: ponto mais alto da janela; suporte: mais baixo (se não for resistência)
+        is_resistance = centers == windows.max(axis=1)
+        is_support = ~is_resistance & (centers == windows.min(axis=1))
         
         # Agrupa níveis próximos
-        self.resistance_levels[symbol] = self._cluster_levels(resistance_candidates)
-        self.support_levels[symbol] = self._cluster_levels(support_candidates)
+        self.resistance_levels[symbol] = self._cluster_levels(centers[is_resistance])
+        self.support_levels[symbol] = self._cluster_levels(centers[is_support])
     
-    def _cluster_levels(self, levels: List[float], tolerance: float = 1.0) -> List[float]:
-        """Agrupa níveis próximos em clusters."""
-        if not levels:
-            return []
-        
-        sorted_levels = sorted(list(set(levels))) # Evita duplicatas que podem quebrar a lógica de cluster
-        clusters = []
-        if not sorted_levels:
-            return []
-            
-        current_cluster = [sorted_levels[0]]
-        
-        for level in sorted_levels[1:]:
-            if level - current_cluster[-1] <= tolerance:
-                current_cluster.append(level)
-            else:
-                # Finaliza cluster atual
-                clusters.append(sum(current_cluster) / len(current_cluster))
-                current_cluster = [level]
-        
-        # Adiciona último cluster
-        if current_cluster:
-            clusters.append(sum(current_cluster) / len(current_cluster))
-        
-        return sorted(clusters, reverse=True)[:5] # Mantém apenas os 5 níveis mais recentes/relevantes
\ No newline at end of file
+    def _cluster_levels(self, levels: np.ndarray, tolerance: float = 1.0) -> np.ndarray:
+        """Agrupa níveis próximos em clusters (centros em ordem crescente)."""
+        # Níveis distintos em ordem crescente (duplicatas quebrariam a lógica de cluster)
+        unique_levels = np.unique(levels)
+        if unique_levels.size == 0:
+            return unique_levels
+        
+        # Novo cluster sempre que a distância para o nível anterior passa da tolerância
+        starts = np.flatnonzero(np.diff(unique_levels) > tolerance) + 1
+        starts = np.concatenate(([0], starts))
+        counts = np.diff(np.append(starts, unique_levels.size))
+        centers = np.add.reduceat(unique_levels, starts) / counts
+        
+        # Centros já saem crescentes: mantém apenas os 5 níveis mais altos
+        return centers[-5:]
\ No newline at end of file
@@ -5,26 +5,47 @@ Detector de divergências com uso duplo:
 2. Cria setups estratégicos quando força > 0.7
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from itertools import count
 from enum import Enum
+from types import MappingProxyType
 import numpy as np
 import logging
+import time
 
 # CORREÇÃO: Imports da classe base e entidades do domínio
 from application.services.base_setup_detector import SetupDetector
-from domain.entities.trade import Trade
+from domain.entities.trade import Trade, SIDE_BUY, SIDE_SELL
 from domain.entities.book import OrderBook
 from domain.entities.strategic_signal import SetupType, StrategicSignal
 from domain.entities.signal import Signal, SignalSource, SignalLevel
+from analyzers.statistics.ring_buffer import RingBuffer
+from analyzers.statistics.trade_window import tail_arrays
+from analyzers.setups._divergence_kernels import _all_divergences_kernel, _all_divergences_batch_kernel
 
 logger = logging.getLogger(__name__)
 
+# Amostras mantidas por símbolo em cada histórico
+_HISTORY_SIZE = 100
 
-@dataclass
+# Validade de um setup de divergência
+_SETUP_EXPIRATION = timedelta(minutes=8)
+
+# Contexto sem CVD: sentinela somente leitura (sem criar um dict vazio por tick)
+_NO_CVD = MappingProxyType({})
+
+# Séries do bloco de entrada do kernel em lote
+_SERIES_PRICE, _SERIES_CVD, _SERIES_MOMENTUM = 0, 1, 2
+
+# Código de direção devolvido pelos kernels -> direção do evento
+_DIRECTIONS = {1: "BULLISH", -1: "BEARISH"}
+
+
+@dataclass(frozen=True, slots=True)
 class DivergenceEvent:
-    """Evento de divergência detectado."""
+    """Evento de divergência detectado (imutável - segue nos details dos warnings)."""
     timestamp: datetime
     symbol: str
     divergence_type: str  # PRICE_CVD, PRICE_VOLUME, CVD_MOMENTUM
@@ -43,6 +64,30 @@ class DivergenceType(str, Enum):
     MULTIPLE = "MULTIPLE"  # Múltiplas divergências
 
 
+def _log_warning(event_type: str, warning_signal: Signal):
+    """Destino dos warnings quando o detector não tem event_bus."""
+    logger.warning(f"DIVERGENCE WARNING: {warning_signal.message}")
+
+
+# Textos dos warnings: emoji por força (< 0.7 / >= 0.7) e mensagem por (tipo, direção)
+_WARNING_EMOJI = ("⚠️", "🚨")
+_WARNING_TEMPLATES = {
+    DivergenceType.PRICE_CVD: "Preço vs CVD divergindo para {direction}",
+    DivergenceType.PRICE_VOLUME: "Volume não confirma movimento de preço",
+    DivergenceType.CVD_MOMENTUM: "CVD e Momentum em conflito",
+    DivergenceType.MULTIPLE: "MÚLTIPLAS divergências para {direction}"
+}
+_WARNING_TEXTS = {
+    (divergence_type, direction): template.format(direction="ALTA" if direction == "BULLISH" else "BAIXA")
+    for divergence_type, template in _WARNING_TEMPLATES.items()
+    for direction in _DIRECTIONS.values()
+}
+
+# Fatores de confluência fixos por tipo e por direção
+_TYPE_FACTORS = {divergence_type: f"Divergência {divergence_type.value}" for divergence_type in DivergenceType}
+_DIRECTION_FACTORS = {direction: f"Direção: {direction}" for direction in _DIRECTIONS.values()}
+
+
 class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
     """
     Detector de divergências com uso duplo.
@@ -54,6 +99,9 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
     
     Emite warning sempre, cria setup se força > 0.7
     """
+    
+    # Sequência dos ids de sinal (compartilhada entre instâncias, única no processo)
+    _signal_ids = count(1)
 # analyzers/setups/divergence_setup_detector.py
 # Modificar o __init__ (linhas 45-57 aproximadamente):
 
@@ -62,26 +110,60 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
         
         # Adicionar o event_bus
         self.event_bus = event_bus
+        # Destino dos warnings resolvido uma vez: event_bus ou, sem ele, o log
+        self._publish = event_bus.publish if event_bus else _log_warning
         
         # Configurações de detecção
         self.min_bars_for_divergence = self.config.get('min_bars_for_divergence', 20)
         self.divergence_threshold = self.config.get('divergence_threshold', 0.3)  # 30%
         self.setup_strength_threshold = self.config.get('setup_strength_threshold', 0.7)
         self.warning_cooldown_seconds = self.config.get('warning_cooldown_seconds', 60)
+        self._cooldown_s = float(self.warning_cooldown_seconds)
+        
+        # Janelas (em amostras) do teste preço vs CVD - a mais forte vence;
+        # janelas curtas pegam divergências rápidas sem baixar o threshold
+        windows = sorted(set(self.config.get('price_cvd_windows', (5, 10, 20))))
+        if not windows or windows[0] < 2 or windows[-1] > _HISTORY_SIZE:
+            raise ValueError(f"price_cvd_windows deve estar em [2, {_HISTORY_SIZE}]: {windows}")
+        self._price_cvd_windows = np.array(windows, dtype=np.int64)
+        
+        # Preço vs volume compara janelas de 20 amostras; preço vs CVD, a maior janela
+        self._price_window = max(20, windows[-1])
+        self._min_history = max(self.min_bars_for_divergence, self._price_window)
+        
+        # Saída do kernel (uma linha por tipo) e o tipo/duração de cada linha
+        self._divergence_rows = np.zeros((3, 4))
+        self._batch_cache = {}  # nº de símbolos -> buffers do detect_batch
+        self._row_types = (
+            (DivergenceType.PRICE_CVD, self.min_bars_for_divergence),
+            (DivergenceType.PRICE_VOLUME, self.min_bars_for_divergence),
+            (DivergenceType.CVD_MOMENTUM, 10)
+        )
         
         # Calculadores de preços
         self.entry_calculator = EntryPriceCalculator(config)
         self.stop_calculator = StopLossCalculator(config)
         self.target_calculator = TargetCalculator(config)
         
-        # Estado interno
-        self.price_history = {'WDO': [], 'DOL': []}
-        self.cvd_history = {'WDO': [], 'DOL': []}
-        self.volume_history = {'WDO': [], 'DOL': []}
-        self.momentum_history = {'WDO': [], 'DOL': []}
-        self.last_warning_time = {'WDO': datetime.min, 'DOL': datetime.min}
+        # Estado interno - históricos em buffers circulares pré-alocados
+        self.price_history = {'WDO': RingBuffer(_HISTORY_SIZE), 'DOL': RingBuffer(_HISTORY_SIZE)}
+        self.cvd_history = {'WDO': RingBuffer(_HISTORY_SIZE), 'DOL': RingBuffer(_HISTORY_SIZE)}
+        self.volume_history = {
+            'WDO': RingBuffer(_HISTORY_SIZE, np.int64),
+            'DOL': RingBuffer(_HISTORY_SIZE, np.int64)
+        }
+        self.momentum_history = {'WDO': RingBuffer(_HISTORY_SIZE), 'DOL': RingBuffer(_HISTORY_SIZE)}
+        
+        # Somas móveis (inteiras) das últimas 10 e 20 amostras de volume
+        self._volume_sum10 = {'WDO': 0, 'DOL': 0}
+        self._volume_sum20 = {'WDO': 0, 'DOL': 0}
+        # Último warning por símbolo (time.monotonic; -inf = nenhum ainda)
+        self.last_warning_time = {'WDO': float('-inf'), 'DOL': float('-inf')}
         self.active_divergences = {'WDO': [], 'DOL': []}
         
+        # Prefixo dos ids de setup por símbolo, montado uma vez
+        self._id_prefix = {symbol: f"DIV_{symbol}_" for symbol in self.price_history}
+        
         logger.info("DivergenceSetupDetector inicializado")
 
     # CORREÇÃO: Adição do método obrigatório
@@ -108,210 +190,223 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
         Returns:
             Lista de sinais estratégicos detectados
         """
-        strategic_signals = []
-        
         if not trades or len(trades) < self.min_bars_for_divergence:
-            return strategic_signals
+            return []
         
         # Atualiza históricos
         self._update_histories(symbol, trades, market_context)
+        if not self._history_warm(symbol):
+            return []
         
         # Detecta todas as divergências
-        divergences = self._detect_all_divergences(symbol)
+        now = datetime.now()
+        divergences = self._detect_all_divergences(symbol, now)
+        
+        return self._process_divergences(divergences, book, market_context, now)
+    
+    def detect_batch(self,
+                     updates: Dict[str, Tuple[List[Trade], Optional[OrderBook], Dict]]
+                     ) -> Dict[str, List[StrategicSignal]]:
+        """
+        Aplica `detect` a vários símbolos do mesmo ciclo (ex.: WDO e DOL) de uma vez:
+        os testes de divergência de todos rodam em uma única chamada do kernel.
+        
+        Args:
+            updates: {símbolo: (trades, book, market_context do símbolo)}
         
-        # Processa cada divergência
+        Returns:
+            {símbolo: sinais detectados}
+        """
+        results = {symbol: [] for symbol in updates}
+        
+        ready = [
+            symbol for symbol, (trades, _, _) in updates.items()
+            if trades and len(trades) >= self.min_bars_for_divergence
+        ]
+        if not ready:
+            return results
+        
+        for symbol in ready:
+            trades, _, market_context = updates[symbol]
+            self._update_histories(symbol, trades, market_context)
+        ready = [symbol for symbol in ready if self._history_warm(symbol)]
+        if not ready:
+            return results
+        
+        # Entradas do kernel em um bloco (símbolo, série, tempo), alinhadas ao fim
+        # da janela - amostras à esquerda do histórico disponível não são lidas
+        n, width = len(ready), self._price_window
+        series, volume_sums, flags, rows = self._batch_buffers(n)
+        for i, symbol in enumerate(ready):
+            price_window, cvd_window, volume_sum10, volume_sum20, momentum_window, price_ready, momentum_ready = \
+                self._kernel_inputs(symbol)
+            series[i, _SERIES_PRICE, width - len(price_window):] = price_window
+            series[i, _SERIES_CVD, width - len(cvd_window):] = cvd_window
+            series[i, _SERIES_MOMENTUM, width - len(momentum_window):] = momentum_window
+            volume_sums[i] = volume_sum10, volume_sum20
+            flags[i] = price_ready, momentum_ready
+        
+        found = _all_divergences_batch_kernel(
+            series, volume_sums, self._price_cvd_windows, self.divergence_threshold, flags, rows
+        )
+        
+        now = datetime.now()
+        for i, symbol in enumerate(ready):
+            _, book, market_context = updates[symbol]
+            divergences = self._divergence_events(symbol, rows[i], found[i], now)
+            results[symbol] = self._process_divergences(divergences, book, market_context, now)
+        
+        return results
+    
+    def _batch_buffers(self, n: int):
+        """
+        Buffers do detect_batch para `n` símbolos, alocados na primeira vez:
+        (séries (n, 3, janela), somas de volume (n, 2), flags (n, 2), saída (n, 3, 4)).
+        """
+        buffers = self._batch_cache.get(n)
+        if buffers is None:
+            buffers = (
+                np.zeros((n, 3, self._price_window)),
+                np.zeros((n, 2), dtype=np.int64),
+                np.zeros((n, 2), dtype=np.bool_),
+                np.zeros((n, 3, 4))
+            )
+            self._batch_cache[n] = buffers
+        return buffers
+    
+    def _process_divergences(self,
+                             divergences: List[DivergenceEvent],
+                             book: Optional[OrderBook],
+                             market_context: Dict,
+                             now: datetime) -> List[StrategicSignal]:
+        """Emite os warnings das divergências e cria os setups das mais fortes."""
+        strategic_signals = []
         for divergence in divergences:
             # Sempre emite warning (com cooldown) via event_bus
             warning_signal = self._create_warning_signal(divergence)
             if warning_signal:
                 # Emite o warning via event_bus ao invés de retorná-lo
-                if hasattr(self, 'event_bus') and self.event_bus:
-                    self.event_bus.publish("DIVERGENCE_WARNING", warning_signal)
-                else:
-                    logger.warning(f"DIVERGENCE WARNING: {warning_signal.message}")
+                self._publish("DIVERGENCE_WARNING", warning_signal)
             
             # Cria setup estratégico se força > threshold
             if divergence.strength >= self.setup_strength_threshold:
-                setup = self._create_divergence_setup(divergence, book, market_context)
+                setup = self._create_divergence_setup(divergence, book, market_context, now)
                 if setup:
                     strategic_signals.append(setup)
         
         return strategic_signals
-        
-    def _detect_all_divergences(self, symbol: str) -> List[DivergenceEvent]:
-        """Detecta todos os tipos de divergência."""
-        divergences = []
-        
-        # 1. Divergência Preço vs CVD
-        price_cvd_div = self._detect_price_cvd_divergence(symbol)
-        if price_cvd_div:
-            divergences.append(price_cvd_div)
-        
-        # 2. Divergência Preço vs Volume
-        price_volume_div = self._detect_price_volume_divergence(symbol)
-        if price_volume_div:
-            divergences.append(price_volume_div)
-        
-        # 3. Divergência CVD vs Momentum
-        cvd_momentum_div = self._detect_cvd_momentum_divergence(symbol)
-        if cvd_momentum_div:
-            divergences.append(cvd_momentum_div)
-        
-        # 4. Verifica divergências múltiplas (mais forte)
-        if len(divergences) >= 2:
-            multiple_div = self._create_multiple_divergence(symbol, divergences)
-            divergences = [multiple_div]  # Substitui por divergência múltipla
-        
-        return divergences
     
-    def _detect_price_cvd_divergence(self, symbol: str) -> Optional[DivergenceEvent]:
-        """Detecta divergência entre preço e CVD."""
-        prices = self.price_history[symbol]
-        cvds = self.cvd_history[symbol]
-        
-        if len(prices) < self.min_bars_for_divergence or len(cvds) < self.min_bars_for_divergence:
-            return None
-        
-        # Calcula mudanças percentuais
-        price_change = (prices[-1] - prices[-20]) / (prices[-20] if prices[-20] != 0 else 1) * 100
-        cvd_change = cvds[-1] - cvds[-20]  # CVD é absoluto, não percentual
-        
-        # Divergência Bullish: preço cai mas CVD sobe
-        if price_change < -self.divergence_threshold and cvd_change > 50:
-            strength = min(abs(cvd_change) / 200, 1.0)  # Normaliza força
-            return DivergenceEvent(
-                timestamp=datetime.now(),
-                symbol=symbol,
-                divergence_type=DivergenceType.PRICE_CVD,
-                direction="BULLISH",
-                strength=strength,
-                price_change=price_change,
-                indicator_change=cvd_change,
-                duration=self.min_bars_for_divergence
-            )
-        
-        # Divergência Bearish: preço sobe mas CVD cai
-        elif price_change > self.divergence_threshold and cvd_change < -50:
-            strength = min(abs(cvd_change) / 200, 1.0)
-            return DivergenceEvent(
-                timestamp=datetime.now(),
-                symbol=symbol,
-                divergence_type=DivergenceType.PRICE_CVD,
-                direction="BEARISH",
-                strength=strength,
-                price_change=price_change,
-                indicator_change=cvd_change,
-                duration=self.min_bars_for_divergence
-            )
-        
-        return None
+    def _detect_all_divergences(self, symbol: str, now: datetime) -> List[DivergenceEvent]:
+        """
+        Detecta todos os tipos de divergência em uma chamada do kernel:
+        preço vs CVD, preço vs volume e CVD vs momentum.
+        """
+        prices, cvds, volume_sum10, volume_sum20, momentums, price_ready, momentum_ready = \
+            self._kernel_inputs(symbol)
+        rows = self._divergence_rows
+        found = _all_divergences_kernel(
+            prices, cvds, volume_sum10, volume_sum20, momentums,
+            self._price_cvd_windows, self.divergence_threshold, price_ready, momentum_ready, rows
+        )
+        return self._divergence_events(symbol, rows, found, now)
     
-    def _detect_price_volume_divergence(self, symbol: str) -> Optional[DivergenceEvent]:
-        """Detecta divergência entre preço e volume."""
-        prices = self.price_history[symbol]
-        volumes = self.volume_history[symbol]
-        
-        if len(prices) < self.min_bars_for_divergence or len(volumes) < self.min_bars_for_divergence:
-            return None
-        
-        # Mudanças
-        price_change = (prices[-1] - prices[-20]) / (prices[-20] if prices[-20] != 0 else 1) * 100
-        avg_volume_recent = np.mean(volumes[-10:])
-        avg_volume_prior = np.mean(volumes[-20:-10])
-        volume_change = (avg_volume_recent - avg_volume_prior) / (avg_volume_prior if avg_volume_prior != 0 else 1) * 100
-        
-        # Divergência: movimento de preço sem suporte de volume
-        if abs(price_change) > self.divergence_threshold and abs(volume_change) < 20:
-            # Movimento suspeito - preço move mas volume não acompanha
-            direction = "BEARISH" if price_change > 0 else "BULLISH"
-            strength = min(abs(price_change) / (abs(volume_change) + 1), 1.0) * 0.8
-            
-            return DivergenceEvent(
-                timestamp=datetime.now(),
-                symbol=symbol,
-                divergence_type=DivergenceType.PRICE_VOLUME,
-                direction=direction,
-                strength=strength,
-                price_change=price_change,
-                indicator_change=volume_change,
-                duration=self.min_bars_for_divergence
-            )
-        
-        return None
+    def _history_warm(self, symbol: str) -> bool:
+        """
+        Há histórico para ao menos um teste (CVD vs momentum pede 10 amostras;
+        os de preço, mais). Os históricos crescem juntos, então basta um.
+        """
+        return len(self.cvd_history[symbol]) >= 10
     
-    def _detect_cvd_momentum_divergence(self, symbol: str) -> Optional[DivergenceEvent]:
-        """Detecta divergência entre CVD e momentum."""
+    def _kernel_inputs(self, symbol: str):
+        """
+        Janelas do histórico usadas pelos testes de divergência.
+        
+        Returns:
+            (preços, cvds, soma de volume 10, soma de volume 20, momentums,
+             price_ready, momentum_ready)
+        """
+        prices = self.price_history[symbol]
         cvds = self.cvd_history[symbol]
         momentums = self.momentum_history[symbol]
-        
-        if len(cvds) < 10 or len(momentums) < 10:
-            return None
-        
-        # Tendências recentes
-        cvd_trend = cvds[-1] - cvds[-10]
-        momentum_trend = momentums[-1] - momentums[-10]
-        
-        # Divergência: CVD e momentum em direções opostas
-        if abs(cvd_trend) > 50 and abs(momentum_trend) > 30:
-            if (cvd_trend > 0 and momentum_trend < 0) or (cvd_trend < 0 and momentum_trend > 0):
-                direction = "BULLISH" if cvd_trend > 0 else "BEARISH"
-                strength = min((abs(cvd_trend) + abs(momentum_trend)) / 200, 1.0) * 0.9
-                
-                return DivergenceEvent(
-                    timestamp=datetime.now(),
+        return (
+            prices.last(self._price_window), cvds.last(self._price_window),
+            self._volume_sum10[symbol], self._volume_sum20[symbol], momentums.last(10),
+            min(len(prices), len(cvds), len(self.volume_history[symbol])) >= self._min_history,
+            min(len(cvds), len(momentums)) >= 10
+        )
+    
+    def _divergence_events(self, symbol: str, rows: np.ndarray, found: int,
+                           now: datetime) -> List[DivergenceEvent]:
+        """
+        Converte a saída do kernel (uma linha por tipo: código, força,
+        variação de preço e do indicador) em eventos de divergência.
+        """
+        if not found:
+            return []
+        
+        # Divergências múltiplas (mais forte) substituem as individuais
+        if found >= 2:
+            return [self._create_multiple_divergence(symbol, rows[rows[:, 0] != 0], now)]
+        
+        for row, (divergence_type, duration) in enumerate(self._row_types):
+            code = rows[row, 0]
+            if code != 0:
+                return [DivergenceEvent(
+                    timestamp=now,
                     symbol=symbol,
-                    divergence_type=DivergenceType.CVD_MOMENTUM,
-                    direction=direction,
-                    strength=strength,
-                    price_change=0,  # Não aplicável
-                    indicator_change=cvd_trend,
-                    duration=10
-                )
-        
-        return None
+                    divergence_type=divergence_type,
+                    direction=_DIRECTIONS[int(code)],
+                    strength=float(rows[row, 1]),
+                    price_change=float(rows[row, 2]),
+                    indicator_change=float(rows[row, 3]),
+                    duration=duration
+                )]
+        return []
     
-    def _create_multiple_divergence(self, symbol: str, divergences: List[DivergenceEvent]) -> DivergenceEvent:
-        """Cria evento de divergência múltipla (mais forte)."""
+    def _create_multiple_divergence(self, symbol: str, active_rows: np.ndarray,
+                                    now: datetime) -> DivergenceEvent:
+        """
+        Cria evento de divergência múltipla (mais forte).
+        
+        Args:
+            active_rows: linhas do kernel com divergência (código, força,
+                variação de preço, variação do indicador), na ordem dos testes
+        """
+        count = len(active_rows)
+        
         # Calcula força combinada
-        avg_strength = np.mean([d.strength for d in divergences])
-        boost = 0.1 * (len(divergences) - 1)  # Bonus por múltiplas divergências
+        avg_strength = float(active_rows[:, 1].mean())
+        boost = 0.1 * (count - 1)  # Bonus por múltiplas divergências
         combined_strength = min(avg_strength + boost, 1.0)
         
         # Direção dominante
-        bullish_count = sum(1 for d in divergences if d.direction == "BULLISH")
-        direction = "BULLISH" if bullish_count > len(divergences) / 2 else "BEARISH"
+        bullish_count = int((active_rows[:, 0] > 0).sum())
+        direction = "BULLISH" if bullish_count > count / 2 else "BEARISH"
         
         return DivergenceEvent(
-            timestamp=datetime.now(),
+            timestamp=now,
             symbol=symbol,
             divergence_type=DivergenceType.MULTIPLE,
             direction=direction,
             strength=combined_strength,
-            price_change=divergences[0].price_change,
-            indicator_change=divergences[0].indicator_change,
+            price_change=float(active_rows[0, 2]),
+            indicator_change=float(active_rows[0, 3]),
             duration=self.min_bars_for_divergence
         )
     
     def _create_warning_signal(self, divergence: DivergenceEvent) -> Optional[Signal]:
         """Cria sinal de warning para divergência (com cooldown)."""
         # Verifica cooldown
-        if datetime.now() - self.last_warning_time[divergence.symbol] < timedelta(seconds=self.warning_cooldown_seconds):
+        now_mono = time.monotonic()
+        if now_mono - self.last_warning_time[divergence.symbol] < self._cooldown_s:
             return None
         
-        self.last_warning_time[divergence.symbol] = datetime.now()
+        self.last_warning_time[divergence.symbol] = now_mono
         
-        # Mensagem baseada no tipo e direção
-        emoji = "⚠️" if divergence.strength < 0.7 else "🚨"
-        direction_text = "ALTA" if divergence.direction == "BULLISH" else "BAIXA"
-        
-        type_messages = {
-            DivergenceType.PRICE_CVD: f"Preço vs CVD divergindo para {direction_text}",
-            DivergenceType.PRICE_VOLUME: f"Volume não confirma movimento de preço",
-            DivergenceType.CVD_MOMENTUM: f"CVD e Momentum em conflito",
-            DivergenceType.MULTIPLE: f"MÚLTIPLAS divergências para {direction_text}"
-        }
-        
-        message = f"{emoji} {divergence.symbol} - {type_messages.get(divergence.divergence_type, 'Divergência detectada')}"
+        # Mensagem baseada no tipo e direção (textos montados na importação)
+        emoji = _WARNING_EMOJI[divergence.strength >= 0.7]
+        text = _WARNING_TEXTS.get((divergence.divergence_type, divergence.direction), 'Divergência detectada')
+        message = f"{emoji} {divergence.symbol} - {text}"
         
         return Signal(
             source=SignalSource.STRATEGIC,
@@ -326,7 +421,8 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
     def _create_divergence_setup(self,
                                   divergence: DivergenceEvent,
                                   book: Optional[OrderBook],
-                                  market_context: Dict) -> Optional[StrategicSignal]:
+                                  market_context: Dict,
+                                  now: datetime) -> Optional[StrategicSignal]:
         """Cria setup estratégico baseado em divergência forte."""
         if not book:
             return None
@@ -361,18 +457,19 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
         reward = abs(targets[0] - entry_price) if targets else 0
         risk_reward = reward / risk if risk > 0 else 0
         
-        # Fatores de confluência
+        # Fatores de confluência - textos fixos vêm prontos; só a força é formatada
         confluence_factors = [
-            f"Divergência {divergence.divergence_type.value}",
+            _TYPE_FACTORS[divergence.divergence_type],
             f"Força: {divergence.strength*100:.0f}%",
-            f"Direção: {divergence.direction}"
+            _DIRECTION_FACTORS[divergence.direction]
         ]
         
         if divergence.divergence_type == DivergenceType.MULTIPLE:
             confluence_factors.append("MÚLTIPLAS divergências confirmadas")
         
         return StrategicSignal(
-            id=f"DIV_{divergence.symbol}_{datetime.now().timestamp()}",
+            id=self._id_prefix[divergence.symbol] + str(next(self._signal_ids)),
+            timestamp=now,
             symbol=divergence.symbol,
             setup_type=SetupType.DIVERGENCE_SETUP,
             direction=direction,
@@ -381,7 +478,7 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
             targets=targets,
             confidence=divergence.strength,
             risk_reward=risk_reward,
-            expiration_time=datetime.now() + timedelta(minutes=8),  # 8 minutos para divergência
+            expiration_time=now + _SETUP_EXPIRATION,
             confluence_factors=confluence_factors,
             metadata={
                 'divergence_type': divergence.divergence_type.value,
@@ -393,37 +490,35 @@ class DivergenceSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetect
     
     def _update_histories(self, symbol: str, trades: List[Trade], market_context: Dict):
         """Atualiza históricos para análise."""
+        # Últimos 10 trades em colunas (uma passada pelos objetos Trade)
+        prices, volumes, sides = tail_arrays(trades, 10)
+        
         # Preço
         if trades:
-            avg_price = np.mean([t.price for t in trades[-10:]])
-            self.price_history[symbol].append(avg_price)
-            if len(self.price_history[symbol]) > 100:
-                self.price_history[symbol].pop(0)
+            self.price_history[symbol].append(prices.mean())
         
         # CVD
-        cvd = market_context.get('cvd', {}).get(symbol, 0)
+        cvd = market_context.get('cvd', _NO_CVD).get(symbol, 0)
         self.cvd_history[symbol].append(cvd)
-        if len(self.cvd_history[symbol]) > 100:
-            self.cvd_history[symbol].pop(0)
         
-        # Volume
-        total_volume = sum(t.volume for t in trades[-10:]) if trades else 0
-        self.volume_history[symbol].append(total_volume)
-        if len(self.volume_history[symbol]) > 100:
-            self.volume_history[symbol].pop(0)
+        # Volume - as somas móveis trocam a amostra que sai de cada janela pela nova
+        total_volume = int(volumes.sum())
+        volume_history = self.volume_history[symbol]
+        n = len(volume_history)
+        self._volume_sum10[symbol] += total_volume - (int(volume_history.ago(10)) if n >= 10 else 0)
+        self._volume_sum20[symbol] += total_volume - (int(volume_history.ago(20)) if n >= 20 else 0)
+        volume_history.append(total_volume)
         
-        # Momentum (simplificado)
+        # Momentum (simplificado) - UNKNOWN fica fora de compra e venda
         if len(trades) >= 10:
-            buy_vol = sum(t.volume for t in trades[-10:] if t.side.name == "BUY")
-            sell_vol = sum(t.volume for t in trades[-10:] if t.side.name == "SELL")
+            buy_vol = int(volumes[sides == SIDE_BUY].sum())
+            sell_vol = int(volumes[sides == SIDE_SELL].sum())
             total_vol = buy_vol + sell_vol
             momentum = ((buy_vol - sell_vol) / (total_vol if total_vol != 0 else 1)) * 100
         else:
             momentum = 0
         
         self.momentum_history[symbol].append(momentum)
-        if len(self.momentum_history[symbol]) > 100:
-            self.momentum_history[symbol].pop(0)
 
 
 class EntryPriceCalculator:
@@ -438,6 +533,8 @@ class EntryPriceCalculator:
             "PULLBACK_REJECTION": 0.5, # Meio termo
             "DIVERGENCE_SETUP": 0.5  # Meio termo
         }
+        # Mesmos offsets indexados pelo membro do enum (sem .name por chamada)
+        self._offsets = {SetupType[name]: offset for name, offset in self.default_offsets.items()}
     
     def calculate(self, 
                   setup_type: SetupType,
@@ -447,11 +544,13 @@ class EntryPriceCalculator:
         """Calcula preço de entrada baseado no setup."""
         context = context or {}
         
+        sign = 1 if direction == "COMPRA" else -1
+        
         # Preço base
-        base_price = book.best_ask if direction == "COMPRA" else book.best_bid
+        base_price = book.best_ask if sign > 0 else book.best_bid
         
         # Offset baseado no tipo
-        offset = self.default_offsets.get(setup_type.name, 0.5)
+        offset = self._offsets.get(setup_type, 0.5)
         
         # Ajustes contextuais
         if setup_type == SetupType.PULLBACK_REJECTION:
@@ -462,7 +561,7 @@ class EntryPriceCalculator:
                 offset = 2.0
         
         # Aplica offset
-        return base_price + offset if direction == "COMPRA" else base_price - offset
+        return base_price + sign * offset
 
 
 class StopLossCalculator:
@@ -477,6 +576,7 @@ class StopLossCalculator:
             "PULLBACK_REJECTION": 3.0,
             "DIVERGENCE_SETUP": 2.5
         }
+        self._stops = {SetupType[name]: stop for name, stop in self.default_stops.items()}
     
     def calculate(self,
                   setup_type: SetupType,
@@ -487,7 +587,7 @@ class StopLossCalculator:
         context = context or {}
         
         # Stop base
-        base_stop = self.default_stops.get(setup_type.name, 2.5)
+        base_stop = self._stops.get(setup_type, 2.5)
         
         # Ajusta por volatilidade
         volatility = context.get('volatility', 'NORMAL')
@@ -503,7 +603,8 @@ class StopLossCalculator:
                 base_stop *= 0.8  # Stop mais apertado para sinais fortes
         
         # Aplica stop
-        return entry_price - base_stop if direction == "COMPRA" else entry_price + base_stop
+        sign = 1 if direction == "COMPRA" else -1
+        return entry_price - sign * base_stop
 
 
 class TargetCalculator:
@@ -518,6 +619,7 @@ class TargetCalculator:
             "PULLBACK_REJECTION": [2.0, 4.0], # Moderado
             "DIVERGENCE_SETUP": [2.5, 5.0]  # Conservador
         }
+        self._ratios = {SetupType[name]: ratios for name, ratios in self.risk_reward_ratios.items()}
     
     def calculate(self,
                   setup_type: SetupType,
@@ -529,18 +631,11 @@ class TargetCalculator:
         context = context or {}
         
         # Risk/reward base
-        rr_ratios = self.risk_reward_ratios.get(setup_type.name, [2.0, 4.0])
+        rr_ratios = self._ratios.get(setup_type, [2.0, 4.0])
         
         # Calcula risco
         risk = abs(entry_price - stop_loss)
+        sign = 1 if direction == "COMPRA" else -1
         
         # Calcula alvos
-        targets = []
-        for ratio in rr_ratios:
-            if direction == "COMPRA":
-                target = entry_price + (risk * ratio)
-            else:
-                target = entry_price - (risk * ratio)
-            targets.append(round(target, 2))
-        
-        return targets
\ No newline at end of file
+        return [round(entry_price + sign * (risk * ratio), 2) for ratio in rr_ratios]
\ No newline at end of file
@@ -7,16 +7,22 @@ Identifica pontos de entrada em reversões de tendência.
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+import numpy as np
 import logging
 
 # Import da classe base do detector e entidades do domínio
 from application.services.base_setup_detector import SetupDetector
-from domain.entities.trade import Trade
+from domain.entities.trade import Trade, SIDE_BUY, SIDE_SELL
 from domain.entities.book import OrderBook
 from domain.entities.strategic_signal import SetupType, StrategicSignal
+from analyzers.statistics.ring_buffer import RingBuffer
+from analyzers.statistics.trade_window import TradeArrays, trade_arrays, trade_timestamps, timestamp_us
 
 logger = logging.getLogger(__name__)
 
+# Preços mantidos por símbolo (a tendência anterior usa só os últimos 30)
+_PRICE_HISTORY_SIZE = 500
+
 
 @dataclass
 class AbsorptionEvent:
@@ -54,7 +60,7 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
         self.absorption_events: List[AbsorptionEvent] = []
         self.volume_baseline = {'WDO': 100, 'DOL': 50}  # Volumes médios
         self.last_cvd = {'WDO': 0, 'DOL': 0}
-        self.price_history = {'WDO': [], 'DOL': []}
+        self.price_history = {'WDO': RingBuffer(_PRICE_HISTORY_SIZE), 'DOL': RingBuffer(_PRICE_HISTORY_SIZE)}
         
         logger.info("ReversalSetupDetector inicializado")
         
@@ -82,16 +88,19 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
         if not trades or len(trades) < 10:
             return signals
         
+        # Colunas extraídas uma vez e compartilhadas pelas duas detecções
+        columns = trade_arrays(trades)
+        
         # Atualiza histórico de preços
-        self._update_price_history(symbol, trades)
+        self._update_price_history(symbol, columns.prices)
         
         # 1. Detecta Reversão Lenta
-        slow_signal = self._detect_slow_reversal(symbol, trades, book, market_context)
+        slow_signal = self._detect_slow_reversal(symbol, columns, book, market_context)
         if slow_signal:
             signals.append(slow_signal)
         
         # 2. Detecta Reversão Violenta
-        violent_signal = self._detect_violent_reversal(symbol, trades, book, market_context)
+        violent_signal = self._detect_violent_reversal(symbol, trades, columns, book, market_context)
         if violent_signal:
             signals.append(violent_signal)
         
@@ -99,13 +108,13 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
     
     def _detect_slow_reversal(self,
                               symbol: str,
-                              trades: List[Trade],
+                              columns: TradeArrays,
                               book: Optional[OrderBook],
                               market_context: Dict) -> Optional[StrategicSignal]:
         """Detecta reversão lenta (absorção + CVD reversal)."""
         
         # 1. Procura por absorção recente
-        absorption = self._find_recent_absorption(symbol, trades)
+        absorption = self._find_recent_absorption(symbol, columns)
         if not absorption:
             return None
         
@@ -135,27 +144,29 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
     def _detect_violent_reversal(self,
                                  symbol: str,
                                  trades: List[Trade],
+                                 columns: TradeArrays,
                                  book: Optional[OrderBook],
                                  market_context: Dict) -> Optional[StrategicSignal]:
         """Detecta reversão violenta (spike + momentum)."""
+        _, volumes, sides = columns
         
         # 1. Detecta spike de volume
-        recent_volume = sum(t.volume for t in trades[-10:])
+        recent_volume = int(volumes[-10:].sum())
         baseline = self.volume_baseline.get(symbol, 100)
         
         if recent_volume < baseline * self.violent_spike_multiplier:
             return None
         
-        # 2. Analisa momentum dos últimos 5 segundos
+        # 2. Analisa momentum dos últimos 5 segundos (timestamps só lidos após o spike)
         five_seconds_ago = datetime.now() - timedelta(seconds=self.violent_timer_seconds)
-        recent_trades = [t for t in trades if t.timestamp > five_seconds_ago]
+        recent = trade_timestamps(trades) > timestamp_us(five_seconds_ago)
         
-        if len(recent_trades) < 5:
+        if np.count_nonzero(recent) < 5:
             return None
         
         # 3. Calcula direção do momentum
-        buy_volume = sum(t.volume for t in recent_trades if t.side.name == "BUY")
-        sell_volume = sum(t.volume for t in recent_trades if t.side.name == "SELL")
+        buy_volume = int(volumes[recent & (sides == SIDE_BUY)].sum())
+        sell_volume = int(volumes[recent & (sides == SIDE_SELL)].sum())
 
         # Evita divisão por zero se não houver trades
         if (buy_volume + sell_volume) == 0:
@@ -164,12 +175,12 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
         momentum = (buy_volume - sell_volume) / (buy_volume + sell_volume) * 100
         
         # 4. Verifica reversão baseada no contexto
-        prices = self.price_history.get(symbol, [])
-        if len(prices) < 30:
+        prices = self.price_history.get(symbol)
+        if prices is None or len(prices) < 30:
             return None
         
         # Tendência anterior (últimos 20 trades antes do spike)
-        prior_trend = prices[-20] - prices[-30]
+        prior_trend = prices.ago(20) - prices.ago(30)
         
         # Reversão para ALTA: queda anterior + momentum comprador forte
         if prior_trend < -2.0 and momentum > self.violent_momentum_threshold:
@@ -185,53 +196,61 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
         
         return None
     
-    def _find_recent_absorption(self, symbol: str, trades: List[Trade]) -> Optional[AbsorptionEvent]:
+    def _find_recent_absorption(self, symbol: str, columns: TradeArrays) -> Optional[AbsorptionEvent]:
         """Encontra eventos de absorção recentes."""
         # Remove eventos antigos
         cutoff = datetime.now() - timedelta(minutes=self.slow_timer_minutes + 1)
         self.absorption_events = [e for e in self.absorption_events if e.timestamp > cutoff]
         
         # Analisa trades para nova absorção
-        level_volumes = {}
-        for trade in trades[-100:]:  # Últimos 100 trades
-            level = round(trade.price / 0.5) * 0.5
-            if level not in level_volumes:
-                level_volumes[level] = {'buy': 0, 'sell': 0, 'total': 0}
-            
-            if trade.side.name == "BUY":
-                level_volumes[level]['buy'] += trade.volume
-            else:
-                level_volumes[level]['sell'] += trade.volume
-            level_volumes[level]['total'] += trade.volume
+        # Níveis como meio-tick inteiro, compactados a partir do menor nível da janela
+        prices, volumes, sides = columns
+        levels = np.rint(prices[-100:] * 2).astype(np.int64)  # Últimos 100 trades
+        base = levels.min()
+        index = levels - base
+        volumes = volumes[-100:]
+        
+        # Volume por nível em uma passada (UNKNOWN conta como venda)
+        level_total = np.bincount(index, weights=volumes).astype(np.int64)
+        level_buy = np.bincount(index, weights=volumes * (sides[-100:] == SIDE_BUY)).astype(np.int64)
+        level_sell = level_total - level_buy
         
         # Procura por absorção significativa
-        for level, volumes in level_volumes.items():
-            if volumes['total'] < self.slow_absorption_threshold:
-                continue
+        absorbed = (
+            (level_total >= self.slow_absorption_threshold)
+            & ((level_sell > level_buy * 1.5) | (level_buy > level_sell * 1.5))
+        )
+        
+        # Vale o primeiro nível na ordem em que aparece nos trades
+        hits = absorbed[index]
+        if hits.any():
+            i = int(index[hits.argmax()])
+            total = int(level_total[i])
+            buy = int(level_buy[i])
+            sell = int(level_sell[i])
+            price = int(base + i) * 0.5
             
             # Absorção vendedora (muita venda mas preço segura)
-            if volumes['sell'] > volumes['buy'] * 1.5:
+            if sell > buy * 1.5:
                 event = AbsorptionEvent(
                     timestamp=datetime.now(),
-                    price=level,
-                    volume=volumes['total'],
+                    price=price,
+                    volume=total,
                     direction="VENDA",
-                    strength=volumes['sell'] / volumes['total']
+                    strength=sell / total
                 )
-                self.absorption_events.append(event)
-                return event
             
             # Absorção compradora (muita compra mas preço não sobe)
-            elif volumes['buy'] > volumes['sell'] * 1.5:
+            else:
                 event = AbsorptionEvent(
                     timestamp=datetime.now(),
-                    price=level,
-                    volume=volumes['total'],
+                    price=price,
+                    volume=total,
                     direction="COMPRA",
-                    strength=volumes['buy'] / volumes['total']
+                    strength=buy / total
                 )
-                self.absorption_events.append(event)
-                return event
+            self.absorption_events.append(event)
+            return event
         
         # Retorna absorção mais recente se houver
         return self.absorption_events[-1] if self.absorption_events else None
@@ -334,17 +353,13 @@ class ReversalSetupDetector(SetupDetector): # CORREÇÃO: Herda de SetupDetector
             }
         )
     
-    def _update_price_history(self, symbol: str, trades: List[Trade]):
+    def _update_price_history(self, symbol: str, prices: np.ndarray):
         """Mantém histórico de preços para análise de tendência."""
         if symbol not in self.price_history:
-            self.price_history[symbol] = []
-        
-        for trade in trades:
-            self.price_history[symbol].append(trade.price)
+            self.price_history[symbol] = RingBuffer(_PRICE_HISTORY_SIZE)
         
-        # Limita tamanho do histórico
-        if len(self.price_history[symbol]) > 1000:
-            self.price_history[symbol] = self.price_history[symbol][-500:]
+        # O buffer circular já limita o tamanho do histórico
+        self.price_history[symbol].append_batch(prices)
     
     def update_cvd(self, symbol: str, cvd: int):
         """Atualiza CVD para detecção de reversão."""
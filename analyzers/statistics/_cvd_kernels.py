@@ -0,0 +1,34 @@
+"""Kernel compilado da soma de delta de volume do CvdCalculator (fallback NumPy sem numba)."""
+
+import numpy as np
+
+from analyzers._njit import njit, select_kernel
+
+
+@njit(cache=True)
+def _cvd_sum_loop(volumes, sides):
+    """
+    Delta de volume em uma passada: compra soma; venda e UNKNOWN subtraem.
+
+    Returns:
+        Soma do delta (int)
+    """
+    acc = 0
+    for i in range(volumes.shape[0]):
+        if sides[i] == 1:  # SIDE_BUY
+            acc += volumes[i]
+        else:
+            acc -= volumes[i]
+    return acc
+
+
+def _cvd_sum_numpy(volumes, sides):
+    """Mesma soma por máscara: delta = 2 * compra - volume total."""
+    buy = int(volumes[sides == 1].sum())
+    return 2 * buy - int(volumes.sum())
+
+
+_cvd_sum = select_kernel(
+    _cvd_sum_loop, _cvd_sum_numpy,
+    (np.zeros(16, dtype=np.int64), np.zeros(16, dtype=np.int8))
+)
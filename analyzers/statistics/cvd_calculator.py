@@ -1,12 +1,17 @@
 # analyzers/statistics/cvd_calculator.py (SEM STATE MANAGER)
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 import numpy as np
 from collections import deque
 from domain.entities.trade import Trade, TradeSide
+from analyzers.statistics.trade_window import TradeArrays, as_trade_arrays
+from analyzers.statistics._cvd_kernels import _cvd_sum
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Membro do enum ligado uma vez (comparação por identidade nos loops)
+_BUY = TradeSide.BUY
+
 class CvdCalculator:
     """Calcula o Cumulative Volume Delta (CVD) - SEM PERSISTÊNCIA."""
     
@@ -18,19 +23,14 @@ class CvdCalculator:
         # Ignora state_manager mesmo se passado
         logger.info("CVD Calculator inicializado sem persistência - valores começam em 0")
 
-    def calculate_cvd_for_trades(self, trades: List[Trade]) -> int:
-        """Calcula o CVD para uma lista de trades."""
+    def calculate_cvd_for_trades(self, trades: Union[List[Trade], TradeArrays]) -> int:
+        """Calcula o CVD para uma lista de trades (ou janela colunar): UNKNOWN conta como venda."""
         if not trades:
             return 0
         
         try:
-            volumes = np.array([trade.volume for trade in trades])
-            sides = np.array([1 if trade.side == TradeSide.BUY else -1 for trade in trades])
-            
-            if volumes.size == 0 or sides.size == 0:
-                return 0
-
-            return int(np.sum(volumes * sides))
+            _, volumes, sides = as_trade_arrays(trades)
+            return int(_cvd_sum(volumes, sides))
         except (IndexError, TypeError) as e:
             logger.error(f"Erro ao calcular CVD para trades. Erro: {e}", exc_info=True)
             return 0
@@ -69,7 +69,7 @@ class CvdCalculator:
             logger.warning(f"Símbolo desconhecido: {symbol}")
             return
         
-        if trade.side == TradeSide.BUY:
+        if trade.side is _BUY:
             self.cumulative_cvd_total[symbol] += trade.volume
         else:
             self.cumulative_cvd_total[symbol] -= trade.volume
@@ -0,0 +1,77 @@
+# analyzers/statistics/ring_buffer.py
+"""
+Buffer circular de tamanho fixo sobre um np.ndarray pré-alocado.
+Substitui deque(maxlen=...) de dicts nos históricos numéricos.
+"""
+
+from typing import Optional
+import numpy as np
+
+
+class RingBuffer:
+    """Coluna numérica com escrita circular e leitura dos últimos k valores."""
+
+    __slots__ = ('buf', 'idx', 'n', 'cap', 'written', '_scratch')
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.buf = np.zeros(capacity, dtype=dtype)
+        self.idx = 0  # Próxima posição de escrita em [0, cap)
+        self.n = 0
+        self.cap = capacity
+        self.written = 0  # Total de valores já escritos (não volta a zero)
+        self._scratch = np.empty(capacity, dtype=dtype)  # Área de montagem da janela que cruza o fim
+
+    def append(self, value) -> None:
+        """Adiciona um valor, descartando o mais antigo se o buffer estiver cheio."""
+        self.buf[self.idx] = value
+        self.idx = self.idx + 1 if self.idx + 1 < self.cap else 0
+        if self.n < self.cap:
+            self.n += 1
+        self.written += 1
+
+    def append_batch(self, values: np.ndarray) -> None:
+        """Adiciona vários valores em ordem (no máximo os últimos `cap` são mantidos)."""
+        k = len(values)
+        if k == 0:
+            return
+        self.written += k
+        if k > self.cap:
+            values = values[-self.cap:]
+            k = self.cap
+
+        end = self.idx + k
+        if end <= self.cap:
+            np.copyto(self.buf[self.idx:end], values)
+        else:
+            first = self.cap - self.idx
+            np.copyto(self.buf[self.idx:], values[:first])
+            np.copyto(self.buf[:end - self.cap], values[first:])
+
+        self.idx = end if end < self.cap else end - self.cap
+        self.n = min(self.n + k, self.cap)
+
+    def ago(self, k: int):
+        """Valor escrito `k` posições atrás (1 = o mais recente); exige 1 <= k <= len."""
+        return self.buf[self.idx - k]
+
+    def last(self, k: Optional[int] = None) -> np.ndarray:
+        """
+        Últimos `k` valores (todos, se None) em ordem cronológica.
+        Sem cópia quando a janela não cruza o fim do buffer; caso contrário
+        os dois segmentos são montados no scratch interno, reaproveitado a
+        cada chamada - o retorno é somente leitura e válido até o próximo last().
+        """
+        k = self.n if k is None else min(k, self.n)
+        start = self.idx - k
+        if start >= 0:
+            return self.buf[start:self.idx]
+        if self.idx == 0:
+            return self.buf[start:]
+        split = -start
+        out = self._scratch[:k]
+        np.copyto(out[:split], self.buf[start:])
+        np.copyto(out[split:], self.buf[:self.idx])
+        return out
+
+    def __len__(self) -> int:
+        return self.n
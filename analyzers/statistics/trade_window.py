@@ -0,0 +1,108 @@
+# analyzers/statistics/trade_window.py
+"""
+Representação colunar (structure-of-arrays) dos trades para os detectores.
+Evita o acesso atributo-a-atributo em objetos Trade nos loops quentes.
+"""
+
+from datetime import datetime
+from operator import attrgetter
+from typing import List, NamedTuple, Optional, Union
+import numpy as np
+
+from domain.entities.trade import Trade, SIDE_CODES
+
+_price = attrgetter('price')
+_volume = attrgetter('volume')
+_side = attrgetter('side')
+_timestamp = attrgetter('timestamp')
+
+
+class TradeArrays(NamedTuple):
+    """Colunas paralelas de uma janela de trades."""
+    prices: np.ndarray   # float64
+    volumes: np.ndarray  # int64
+    sides: np.ndarray    # int8 (SIDE_BUY / SIDE_SELL / SIDE_UNKNOWN)
+
+
+def trade_arrays(trades: List[Trade]) -> TradeArrays:
+    """Converte uma lista de trades em colunas NumPy."""
+    n = len(trades)
+    return TradeArrays(
+        prices=np.fromiter(map(_price, trades), dtype=np.float64, count=n),
+        volumes=np.fromiter(map(_volume, trades), dtype=np.int64, count=n),
+        sides=np.fromiter(map(SIDE_CODES.__getitem__, map(_side, trades)), dtype=np.int8, count=n)
+    )
+
+
+def trade_timestamps(trades: List[Trade]) -> np.ndarray:
+    """
+    Timestamps dos trades em microssegundos inteiros (int64), sem criar timedelta.
+    Conversão exata; datetimes sem fuso são lidos como estão (sem hora local).
+    A diferença de dois deles / 1e6 é idêntica a timedelta.total_seconds().
+    """
+    return np.fromiter(map(_timestamp, trades), dtype='datetime64[us]', count=len(trades)).view(np.int64)
+
+
+def timestamp_us(timestamp: datetime) -> int:
+    """Um datetime na mesma escala de `trade_timestamps`."""
+    return int(np.datetime64(timestamp, 'us').astype(np.int64))
+
+
+def as_trade_arrays(trades: Union[List[Trade], TradeArrays]) -> TradeArrays:
+    """Aceita uma janela já colunar (TradeArrays) ou a lista legada de trades."""
+    if isinstance(trades, TradeArrays):
+        return trades
+    return trade_arrays(trades)
+
+
+def tail_arrays(trades: Union[List[Trade], TradeArrays], count: int) -> TradeArrays:
+    """Últimos `count` trades em colunas; na lista legada converte só a cauda."""
+    if isinstance(trades, TradeArrays):
+        return TradeArrays(trades.prices[-count:], trades.volumes[-count:], trades.sides[-count:])
+    return trade_arrays(trades[-count:])
+
+
+class TradeWindow:
+    """
+    Janela rolante de trades em colunas NumPy (ring buffer).
+    Cada trade é gravado em duas posições (i e i + capacity), de modo que
+    os últimos N trades são sempre uma fatia contígua - sem cópia na leitura.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.prices = np.zeros(2 * capacity, dtype=np.float64)
+        self.volumes = np.zeros(2 * capacity, dtype=np.int64)
+        self.sides = np.zeros(2 * capacity, dtype=np.int8)
+        self.head = 0  # Próxima posição de escrita em [0, capacity)
+        self.size = 0
+
+    def append(self, trade: Trade) -> None:
+        """Adiciona um trade, descartando o mais antigo se a janela estiver cheia."""
+        h = self.head
+        price, volume, side = trade.price, trade.volume, SIDE_CODES[trade.side]
+        self.prices[h] = self.prices[h + self.capacity] = price
+        self.volumes[h] = self.volumes[h + self.capacity] = volume
+        self.sides[h] = self.sides[h + self.capacity] = side
+        self.head = h + 1 if h + 1 < self.capacity else 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def extend(self, trades: List[Trade]) -> None:
+        """Adiciona vários trades em ordem."""
+        for trade in trades:
+            self.append(trade)
+
+    def view(self, count: Optional[int] = None) -> TradeArrays:
+        """Retorna os últimos `count` trades (todos, se None) como fatias contíguas."""
+        n = self.size if count is None else min(count, self.size)
+        end = self.head + self.capacity
+        start = end - n
+        return TradeArrays(
+            prices=self.prices[start:end],
+            volumes=self.volumes[start:end],
+            sides=self.sides[start:end]
+        )
+
+    def __len__(self) -> int:
+        return self.size
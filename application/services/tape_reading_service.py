@@ -11,7 +11,9 @@ from analyzers.patterns import (
     PressureDetector, VolumeSpikeDetector
 )
 from analyzers.patterns.defensive_filter import DefensiveSignalFilter
+from analyzers.patterns.fused_window_detector import FusedWindowDetector
 from analyzers.statistics.cvd_calculator import CvdCalculator
+from analyzers.statistics.trade_window import TradeWindow
 from analyzers.formatters.signal_formatter import SignalFormatter
 from application.interfaces.system_event_bus import ISystemEventBus
 from config import settings
@@ -32,12 +34,26 @@ class TapeReadingService:
         
         # Detectores unificados
         self.detectors = self._create_detectors()
+        self.window_detector = FusedWindowDetector(
+            self.detectors['absorption'],
+            self.detectors['iceberg'],
+            self.detectors['momentum'],
+            self.detectors['pressure'],
+            self.detectors['volume_spike'],
+            short_window=50,
+            pressure_window=20
+        )
         
         # CVD e formatadores
         self.cvd_calculators = {
             'WDO': CvdCalculator(),
             'DOL': CvdCalculator()
         }
+        # Janela colunar dos últimos 100 trades (espelha o trade_cache)
+        self.trade_windows = {
+            'WDO': TradeWindow(100),
+            'DOL': TradeWindow(100)
+        }
         self.formatter = SignalFormatter()
         self.defensive_filter = DefensiveSignalFilter()
         
@@ -81,6 +97,7 @@ class TapeReadingService:
             if trade.symbol in ['WDO', 'DOL']:
                 by_symbol.setdefault(trade.symbol, []).append(trade)
                 self.cvd_calculators[trade.symbol].update_cumulative(trade)
+                self.trade_windows[trade.symbol].append(trade)
         
         # Processa cada símbolo
         for symbol, symbol_trades in by_symbol.items():
@@ -107,40 +124,29 @@ class TapeReadingService:
     
     def _detect_patterns(self, symbol: str) -> List[Signal]:
         """Detecta padrões de forma otimizada."""
-        # Cache de trades
-        trades_100 = self.trade_cache.get_recent_trades(symbol, 100)
-        trades_50 = trades_100[-50:] if len(trades_100) > 50 else trades_100
-        trades_20 = trades_50[-20:] if len(trades_50) > 20 else trades_50
+        # Cache de trades (CVD e último trade); os detectores usam a janela colunar
+        trades_50 = self.trade_cache.get_recent_trades(symbol, 50)
         
         if not trades_50:
             return []
         
         signals = []
         
-        # Detecta cada padrão
-        patterns = [
-            ('absorption', trades_100),
-            ('pressure', trades_20),
-            ('volume_spike', trades_50),
-        ]
-        
-        for detector_name, trades_subset in patterns:
-            result = self.detectors[detector_name].detect(trades_subset)
-            if result:
-                signals.append(self.formatter.format(result, symbol))
+        # Visões colunares (sem cópia) da mesma janela
+        window = self.trade_windows[symbol]
         
         # Momentum com CVD
         cvd_roc = self.cvd_calculators[symbol].update_and_get_roc(trades_50, 15)
-        momentum = self.detectors['momentum'].detect_divergence(trades_50, cvd_roc)
-        if momentum:
-            signals.append(self.formatter.format(momentum, symbol))
-        
-        # Iceberg (por trade)
-        if trades_50:
-            last_trade = trades_50[-1]
-            iceberg = self.detectors['iceberg'].detect(last_trade, trades_50)
-            if iceberg:
-                signals.append(self.formatter.format(iceberg, symbol))
+        
+        # Absorção (100), pressão (20), spike (10), momentum e iceberg (50)
+        # em uma única varredura da janela - já na ordem de emissão
+        results = self.window_detector.detect(
+            window.view(100), trades_50[-1], cvd_roc
+        )
+        
+        for result in results:
+            if result:
+                signals.append(self.formatter.format(result, symbol))
         
         return signals
     
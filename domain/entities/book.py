@@ -1,6 +1,10 @@
 # domain/entities/book.py
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, PrivateAttr
+from itertools import accumulate
+from operator import attrgetter
+from typing import List, Optional
+
+_volume = attrgetter('volume')
 
 class BookLevel(BaseModel):
     """Representa um nível de preço no livro de ofertas."""
@@ -15,6 +19,10 @@ class OrderBook(BaseModel):
     bids: List[BookLevel] = Field(default_factory=list)
     asks: List[BookLevel] = Field(default_factory=list)
 
+    # Somas acumuladas de volume por nível (calculadas uma vez por book imutável)
+    _bid_cum_volume: Optional[List[int]] = PrivateAttr(default=None)
+    _ask_cum_volume: Optional[List[int]] = PrivateAttr(default=None)
+
     @property
     def best_bid(self) -> float:
         return self.bids[0].price if self.bids else 0.0
@@ -22,6 +30,20 @@ class OrderBook(BaseModel):
     @property
     def best_ask(self) -> float:
         return self.asks[0].price if self.asks else 0.0
+
+    def top_bid_volume(self, n: int) -> int:
+        """Volume somado dos `n` primeiros níveis de compra."""
+        cum = self._bid_cum_volume
+        if cum is None:
+            cum = self._bid_cum_volume = list(accumulate(map(_volume, self.bids), initial=0))
+        return cum[min(n, len(cum) - 1)]
+
+    def top_ask_volume(self, n: int) -> int:
+        """Volume somado dos `n` primeiros níveis de venda."""
+        cum = self._ask_cum_volume
+        if cum is None:
+            cum = self._ask_cum_volume = list(accumulate(map(_volume, self.asks), initial=0))
+        return cum[min(n, len(cum) - 1)]
     
     class Config:
         frozen = True
\ No newline at end of file
@@ -8,6 +8,17 @@ class TradeSide(str, Enum):
     SELL = "SELL"
     UNKNOWN = "UNKNOWN"
 
+# Códigos inteiros de lado (int8 nas colunas NumPy); o sinal dá o delta de volume
+SIDE_BUY = 1
+SIDE_SELL = -1
+SIDE_UNKNOWN = 0
+
+SIDE_CODES = {
+    TradeSide.BUY: SIDE_BUY,
+    TradeSide.SELL: SIDE_SELL,
+    TradeSide.UNKNOWN: SIDE_UNKNOWN
+}
+
 class Trade(BaseModel):
     """Representa um único negócio executado no mercado."""
     symbol: str
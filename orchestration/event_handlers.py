@@ -32,6 +32,10 @@ class OrchestrationHandlers:
     """
     Sprint 5 - Versão completa com todos os handlers de eventos integrados.
     """
+    
+    # Detectores com detect_batch: uma chamada por ciclo para todos os símbolos
+    _BATCH_DETECTORS = ('continuation', 'divergence')
+    
     def __init__(
         self,
         event_bus: ISystemEventBus,
@@ -155,6 +159,8 @@ class OrchestrationHandlers:
 
     def _check_strategic_setups(self, market_data: MarketData, new_trades: List[Trade]):
         """Verifica setups estratégicos através dos detectores."""
+        # Entradas dos símbolos com trades novos: (trades, book, contexto do símbolo)
+        updates = {}
         for symbol in ['WDO', 'DOL']:
             if symbol not in market_data.data:
                 continue
@@ -169,16 +175,29 @@ class OrchestrationHandlers:
             if not symbol_trades:
                 continue
             
+            updates[symbol] = (symbol_data.trades, symbol_data.book, market_context)
+        
+        if not updates:
+            return
+        
+        # Detectores em lote rodam uma vez para todos os símbolos do ciclo
+        batch_results = {}
+        for detector_name in self._BATCH_DETECTORS:
+            try:
+                batch_results[detector_name] = self.setup_detectors[detector_name].detect_batch(updates)
+            except Exception as e:
+                logger.error(f"Erro no detector {detector_name}: {e}", exc_info=True)
+                batch_results[detector_name] = {}
+        
+        for symbol, (trades, book, market_context) in updates.items():
             # Processa todos os detectores da mesma forma
             for detector_name, detector in self.setup_detectors.items():
                 try:
                     # TODOS os detectores agora retornam apenas List[StrategicSignal]
-                    strategic_signals = detector.detect(
-                        symbol,
-                        symbol_data.trades,
-                        symbol_data.book,
-                        market_context
-                    )
+                    if detector_name in batch_results:
+                        strategic_signals = batch_results[detector_name].get(symbol, [])
+                    else:
+                        strategic_signals = detector.detect(symbol, trades, book, market_context)
                     
                     # Processa cada sinal estratégico detectado
                     for signal in strategic_signals: